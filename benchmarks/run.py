@@ -0,0 +1,161 @@
+"""Offline benchmarks for profiling and the four pipelines.
+
+Every model call goes to ``StubModel``, so no API key is needed and results only move
+when the library itself changes. Example:
+
+    python benchmarks/run.py --rows 1000 100000 --columns 10 1000 --latency 0.05 --output results.json
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+try:
+    import autoprocess
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generate", "src"))
+    import autoprocess
+
+from autoprocess import (DataCleaningPipeline, DataTransformationPipeline, FeatureEngineeringPipeline,
+                         SkewCorrectionPipeline, Tracer, describe_dataset, run_all)
+from autoprocess.cache import PROFILE_CACHE
+from autoprocess.helper import gen_des
+from stub_model import StubModel
+from synthetic import make_frame
+
+ROWS = (10**3, 10**4, 10**5, 10**6, 10**7)
+COLUMNS = (10, 100, 1000, 5000)
+STAGES = ("gen_des", "gen_des_approximate", "describe_cached", "clean", "clean_memory", "transform", "unskew", "features",
+          "concurrent")
+
+
+def measure(func, memory: bool):
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2**20 if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def pipelines(model, tracer):
+    options = dict(model=model, scheduler=False, tracer=tracer)
+    return {
+        "clean": DataCleaningPipeline(**options),
+        "clean_memory": DataCleaningPipeline(optimize_memory=True, in_place=True, **options),
+        "transform": DataTransformationPipeline(**options),
+        "unskew": SkewCorrectionPipeline(**options),
+        "features": FeatureEngineeringPipeline(**options),
+    }
+
+
+def stage_calls(df, stage: str, pipes: dict, args):
+    target = "target"
+    if stage == "gen_des":
+        return lambda: gen_des(df, target=target)
+    if stage == "gen_des_approximate":
+        return lambda: gen_des(df, target=target, approximate=True)
+    if stage == "describe_cached":
+        # Second lookup of an already profiled frame: fingerprint plus cache hit.
+        describe_dataset(df, target=target)
+        return lambda: describe_dataset(df, target=target)
+    if stage == "clean":
+        return lambda: pipes["clean"].data_clean(df, target=target)
+    if stage == "clean_memory":
+        return lambda: pipes["clean_memory"].data_clean(df, target=target)
+    if stage == "transform":
+        return lambda: pipes["transform"].generate_transformation_code(df, target=target, shard_size=args.shard_size)
+    if stage == "unskew":
+        return lambda: pipes["unskew"].generate_batch_skew_correction(df)
+    if stage == "features":
+        return lambda: pipes["features"].generate_features(df, target, shard_size=args.shard_size)
+    # All four pipelines at once, as a batch job would run them.
+    tasks = [
+        functools.partial(pipes["clean"].adata_clean, df, target=target),
+        functools.partial(pipes["transform"].agenerate_transformation_code, df, target=target),
+        functools.partial(pipes["unskew"].agenerate_batch_skew_correction, df),
+        functools.partial(pipes["features"].agenerate_features, df, target),
+    ]
+    return lambda: run_all(tasks, max_concurrency=4)
+
+
+def bench(rows: int, columns: int, args) -> list:
+    df = make_frame(rows, columns, seed=args.seed)
+    model = StubModel(latency=args.latency)
+    results = []
+    for stage in args.stages:
+        if not args.warm:
+            PROFILE_CACHE.clear()
+        pipes = pipelines(model, Tracer())
+        call = stage_calls(df, stage, pipes, args)
+        model.reset()
+        hits = PROFILE_CACHE.hits
+        _, seconds, peak = measure(call, not args.no_memory)
+        reports = [pipe.last_report for pipe in pipes.values() if getattr(pipe, "last_report", None)]
+        summary = {}
+        for report in reports:
+            for key, value in report["summary"].items():
+                summary[key] = summary.get(key, 0) + value
+        results.append({
+            "rows": rows,
+            "columns": columns,
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "peak_mb": round(peak, 2) if peak is not None else None,
+            "model_calls": sum(model.calls.values()),
+            "calls_by_kind": dict(model.calls),
+            "profile_cache_hits": PROFILE_CACHE.hits - hits,
+            "refine_iterations": summary.get("refine_iterations", 0),
+            "model_time": round(summary.get("model_time", 0.0), 4),
+        })
+    return results
+
+
+def print_row(row: dict):
+    peak = "-" if row["peak_mb"] is None else f"{row['peak_mb']:.1f}"
+    print(f"{row['rows']:>9} {row['columns']:>6} {row['stage']:<20} {row['seconds']:>9.3f} {peak:>9} "
+          f"{row['model_calls']:>6} {row['profile_cache_hits']:>6}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark autoprocess offline with a stub model.")
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS)
+    parser.add_argument("--columns", type=int, nargs="+", default=COLUMNS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--max-cells", type=float, default=1e8,
+                        help="skip grid points with more rows * columns than this (the default keeps 10^7 x 10)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds slept per stub model call")
+    parser.add_argument("--shard-size", type=int, default=None, help="column shard size for transform/features")
+    parser.add_argument("--warm", action="store_true", help="keep the profile cache between stages")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc (it slows profiling down)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write all results to this JSON file")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>9} {'cols':>6} {'stage':<20} {'seconds':>9} {'peak MB':>9} {'calls':>6} {'hits':>6}")
+    results = []
+    for rows in args.rows:
+        for columns in args.columns:
+            if rows * columns > args.max_cells:
+                print(f"{rows:>9} {columns:>6} skipped (more than --max-cells cells)")
+                continue
+            for row in bench(rows, columns, args):
+                print_row(row)
+                results.append(row)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"version": autoprocess.__version__, "latency": args.latency, "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+
+# Deterministic stand-in for the Gemini model: it recognises which pipeline step a
+# prompt belongs to and replays a canned response, so every pipeline path can be
+# benchmarked offline. The canned code is generic (it discovers columns at run time)
+# and therefore runs on any synthetic frame.
+
+STRATEGY = json.dumps({
+    "missing_values": {"method": "impute", "parameters": {"numeric": "median", "categorical": "mode"}, "reason": "benchmark"},
+    "outlier_handling": {"method": "IQR", "parameters": {"factor": 1.5}, "reason": "benchmark"},
+    "duplicate_handling": {"action": "drop", "parameters": {}, "reason": "benchmark"},
+    "datatype_handling": {}, "categorical_encoding": {}, "scaling_normalisation": {},
+    "feature_creation": [], "feature_transformation": [], "columns_to_drop": [],
+})
+
+CODE = {
+    "clean": (
+        "import pandas as pd\n"
+        "df = df.drop_duplicates()\n"
+        "for col in df.select_dtypes('number').columns:\n"
+        "    df[col + '_cleaned'] = df[col].fillna(df[col].median())\n"
+    ),
+    "transform": (
+        "import pandas as pd\n"
+        "for col in df.select_dtypes('number').columns:\n"
+        "    df[col + '_transformed'] = (df[col] - df[col].mean()) / (df[col].std() or 1)\n"
+    ),
+    "unskew": (
+        "import numpy as np\n"
+        "for col in df.select_dtypes('number').columns:\n"
+        "    if df[col].min() >= 0:\n"
+        "        df[col + '_unskewed'] = np.log1p(df[col])\n"
+    ),
+    "features": (
+        "import pandas as pd\n"
+        "numeric = list(df.select_dtypes('number').columns)[:2]\n"
+        "if len(numeric) == 2:\n"
+        "    df['interaction_engineered'] = df[numeric[0]] * df[numeric[1]]\n"
+    ),
+}
+
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Replays canned responses; ``latency`` seconds are slept per call to mimic the API."""
+
+    model_name = "models/benchmark-stub"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _kind(self, prompt: str) -> str:
+        lowered = prompt.lower()
+        if lowered.startswith(("validate", "review")) or "respond 'valid'" in lowered:
+            return "validation"
+        if lowered.startswith("feedback") or lowered.startswith("refinement"):
+            return "refinement"
+        if lowered.startswith("generate production-ready python code"):
+            return "code"
+        return "strategy"
+
+    def _stage(self, prompt: str) -> str:
+        # Every code prompt names the suffix its new columns must carry.
+        for suffix, stage in (("_engineered", "features"), ("_unskewed", "unskew"), ("_transformed", "transform")):
+            if suffix in prompt:
+                return stage
+        return "clean"
+
+    def generate_content(self, prompt, **kwargs):
+        prompt = prompt if isinstance(prompt, str) else "\n".join(map(str, prompt))
+        kind = self._kind(prompt)
+        with self._lock:
+            self.calls[kind] = self.calls.get(kind, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if kind == "validation":
+            return StubResponse("production-ready. VALID. No errors found.")
+        if kind == "strategy":
+            return StubResponse(STRATEGY)
+        return StubResponse(CODE[self._stage(prompt)])
+
+    def reset(self):
+        with self._lock:
+            self.calls = {}
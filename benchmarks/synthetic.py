@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic frames with the column mix the pipelines care about: symmetric and skewed
+# numerics, integers, low- and high-cardinality strings, and injected missing values.
+
+KINDS = ("normal", "lognormal", "integer", "category", "text", "normal_missing")
+
+
+def make_frame(rows: int, columns: int, seed: int = 0, target: bool = True) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns - int(target)):
+        kind = KINDS[i % len(KINDS)]
+        name = f"{kind}_{i}"
+        if kind == "normal":
+            data[name] = rng.normal(size=rows)
+        elif kind == "lognormal":
+            data[name] = rng.lognormal(sigma=1.0, size=rows)
+        elif kind == "integer":
+            data[name] = rng.integers(0, 1000, size=rows)
+        elif kind == "category":
+            data[name] = pd.Categorical.from_codes(rng.integers(0, 8, size=rows), [f"level_{k}" for k in range(8)]).astype(object)
+        elif kind == "text":
+            data[name] = np.char.add("id_", rng.integers(0, max(rows // 2, 1), size=rows).astype(str)).astype(object)
+        else:
+            values = rng.normal(size=rows)
+            values[rng.random(rows) < 0.2] = np.nan
+            data[name] = values
+    frame = pd.DataFrame(data)
+    if target:
+        first = frame.select_dtypes("number").columns
+        base = frame[first[0]].to_numpy() if len(first) else 0.0
+        frame["target"] = 2 * base + rng.normal(size=rows)
+    return frame
+
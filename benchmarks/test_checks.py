@@ -0,0 +1,138 @@
+"""Small behaviour checks for the numerics the benchmarks rely on.
+
+Run with ``python -m pytest benchmarks`` or directly with ``python benchmarks/test_checks.py``.
+"""
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+try:
+    import autoprocess  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generate", "src"))
+
+from autoprocess.helper import column_moments, correlation_summary, finalize_moments
+from autoprocess.memory import narrow_column
+from autoprocess.scheduler import RequestScheduler, TokenBucket
+from autoprocess.sketch import HeavyHitters, HyperLogLog, ReservoirSample
+from autoprocess.streaming import merge_moments
+
+
+def _frame(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"a": rng.lognormal(size=rows), "b": rng.normal(size=rows), "c": rng.integers(0, 50, rows)})
+    df.loc[rng.random(rows) < 0.1, "b"] = np.nan
+    return df
+
+
+def test_merged_moments_match_pandas():
+    df = _frame()
+    arr = df.to_numpy(dtype="float64")
+    merged = column_moments(arr[:700])
+    for start in range(700, len(arr), 450):
+        merged = merge_moments(merged, column_moments(arr[start:start + 450]))
+    final = finalize_moments(merged)
+    np.testing.assert_allclose(final["mean"], df.mean().to_numpy())
+    np.testing.assert_allclose(final["std"], df.std().to_numpy())
+    np.testing.assert_allclose(final["skew"], df.skew().to_numpy(), rtol=1e-9)
+
+
+def test_correlation_is_pairwise_complete():
+    rng = np.random.default_rng(1)
+    a = rng.normal(size=5000)
+    b = a + 0.3 * rng.normal(size=5000)
+    a[b > 0.5] = np.nan  # informative missingness
+    df = pd.DataFrame({"a": a, "b": b, "c": rng.normal(size=5000)})
+    summary = correlation_summary(df, top_k=2)
+    assert abs(summary["a"]["b"] - df.corr().loc["a", "b"]) < 0.01
+
+
+def test_sketches():
+    values = pd.Series(np.arange(50_000) % 20_000)
+    halves = HyperLogLog(0.01).update(values[:25_000]), HyperLogLog(0.01).update(values[25_000:])
+    assert abs(halves[0].merge(halves[1]).estimate() - 20_000) < 20_000 * 0.03
+
+    skewed = pd.Series(["x"] * 600 + ["y"] * 300 + [str(i) for i in range(100)])
+    hitters = HeavyHitters(0.05).update(skewed)
+    assert [value for value, _ in hitters.top(2)] == ["x", "y"]
+    assert 600 - 0.05 * len(skewed) <= hitters.counts["x"] <= 600
+
+    reservoir = ReservoirSample(1000)
+    for start in range(0, 100_000, 10_000):
+        reservoir.update(pd.Series(np.arange(start, start + 10_000)))
+    assert len(reservoir.items) == 1000 and reservoir.seen == 100_000
+    assert abs(np.mean(reservoir.items) - 50_000) < 5_000
+
+
+def test_freezer_replays_fit_state():
+    from autoprocess import GeneratedTransformer
+    code = (
+        "import numpy as np\nimport pandas as pd\n"
+        "df['x_centered'] = df['x'] - df['x'].median()\n"
+        "df['row_mean'] = np.mean(df[['x', 'y']].to_numpy(), 1)\n"
+        "df['bin'] = pd.qcut(df['x'], 4, labels=False)\n"
+        "df = pd.get_dummies(df, columns=['c'])\n"
+    )
+    train = pd.DataFrame({"x": np.arange(100.0), "y": np.ones(100), "c": list("ab") * 50})
+    transformer = GeneratedTransformer(code).fit(train)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        out = transformer.transform(pd.DataFrame({"x": [0.0, 99.0], "y": [1.0, 3.0], "c": ["a", "z"]}))
+    assert list(out.columns) == transformer.feature_names_out_
+    assert out["x_centered"].tolist() == [-49.5, 49.5]
+    assert out["row_mean"].tolist() == [0.5, 51.0]
+    assert out["bin"].tolist() == [0, 3]
+    assert out["c_b"].tolist() == [False, False]
+
+
+def test_narrowing_keeps_values():
+    assert narrow_column(pd.Series([300, 1]), "int8").dtype == "int64"
+    assert narrow_column(pd.Series([25.5, 1.0]), "Int8").dtype == "float64"
+    assert narrow_column(pd.Series([1.0, np.nan]), "int8").dtype == "Int8"
+
+
+class _Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("temporarily unavailable")
+        return type("Response", (), {"text": "ok"})()
+
+
+def test_scheduler_retries_and_priority():
+    scheduler = RequestScheduler(max_retries=2, base_delay=0.001, max_delay=0.001)
+    assert scheduler.call(_Flaky(2), "prompt").text == "ok" and scheduler.retries == 2
+    try:
+        scheduler.call(_Flaky(5), "prompt")
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("the scheduler should give up after max_retries")
+
+    gate = RequestScheduler(max_concurrency=1)
+    gate._enter(0)
+    served = []
+    for priority in (5, 1, 3):
+        assert gate._try_enter(priority, lambda p=priority: served.append(p)) is not None
+    for _ in range(3):
+        gate._release()
+    assert served == [1, 3, 5]
+
+    bucket = TokenBucket(per_minute=60, capacity=1)
+    assert bucket.reserve() == 0.0
+    assert 0.9 < bucket.reserve() <= 1.0
+
+
+if __name__ == "__main__":
+    for name, check in list(globals().items()):
+        if name.startswith("test_"):
+            check()
+            print(f"ok  {name}")
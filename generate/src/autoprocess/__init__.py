@@ -3,6 +3,13 @@ from .cleaning import DataCleaningPipeline
 from .transforming import DataTransformationPipeline
 from .unskew import SkewCorrectionPipeline
 from .feature_eng import FeatureEngineeringPipeline
+from .cache import ProfileCache, ResponseCache
+from .helper import describe_dataset
+from .concurrency import arun_all, run_all
+from .validation import LocalValidation, validate_locally
+from .scheduler import RequestScheduler
+from .tracing import Tracer
+from .memory import optimize_dtypes
 
 __version__ = "0.1.0"
 __all__ = [
@@ -10,9 +17,37 @@ __all__ = [
     "DataTransformationPipeline",
     "SkewCorrectionPipeline",
     "FeatureEngineeringPipeline",
+    "ResponseCache",
+    "ProfileCache",
+    "describe_dataset",
+    "arun_all",
+    "run_all",
+    "LocalValidation",
+    "validate_locally",
+    "RequestScheduler",
+    "Tracer",
+    "optimize_dtypes",
+    "GeneratedTransformer",
+    "compile_code",
+    "ChunkedExecutor",
+    "PipelineOrchestrator",
 ]
 
 
+def __getattr__(name):
+    # scikit-learn is only imported when compiled transformers are actually used.
+    if name in ("GeneratedTransformer", "compile_code"):
+        from . import compiled
+        return getattr(compiled, name)
+    if name == "ChunkedExecutor":
+        from .execution import ChunkedExecutor
+        return ChunkedExecutor
+    if name == "PipelineOrchestrator":
+        from .orchestrator import PipelineOrchestrator
+        return PipelineOrchestrator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_version():
     """Return current library version"""
     return __version__
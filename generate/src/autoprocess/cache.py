@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from .chain import agenerate_content
+
+
+def default_cache_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".cache", "autoprocess", "responses.sqlite")
+
+
+def cache_key(model_name: str, prompt) -> str:
+    # Prompts are either a string or a list of parts (FeatureEngineeringPipeline).
+    payload = json.dumps([model_name, prompt], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL and size-bounded LRU eviction.
+
+    Any object exposing ``get(key)`` / ``set(key, text)`` can be used in its place.
+    """
+
+    def __init__(self, path: str = None, ttl: float = None, max_entries: int = 10_000):
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT text, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, text: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, text, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, text, now, now)
+            )
+            # Evict least recently used entries beyond the size bound.
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self),
+        }
+
+
+class CachedResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class CachedModel:
+    """Wraps a model so identical prompts are answered from the cache."""
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+
+    def generate_content(self, prompt, **kwargs):
+        key = cache_key(self.model_name, [prompt, kwargs] if kwargs else prompt)
+        text = self.cache.get(key)
+        if text is not None:
+            return CachedResponse(text)
+        response = self.model.generate_content(prompt, **kwargs)
+        try:
+            text = response.text
+        except ValueError:
+            # Blocked or empty candidates; let the pipeline handle it uncached.
+            return response
+        if text:
+            self.cache.set(key, text)
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        key = cache_key(self.model_name, [prompt, kwargs] if kwargs else prompt)
+        text = self.cache.get(key)
+        if text is not None:
+            return CachedResponse(text)
+        response = await agenerate_content(self.model, prompt, **kwargs)
+        try:
+            text = response.text
+        except ValueError:
+            return response
+        if text:
+            self.cache.set(key, text)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def dataset_fingerprint(dataset, sample_rows: int = 1024):
+    """Cheap identity for a dataset version: shape, dtypes and a hashed row sample.
+
+    Paths are fingerprinted by size and modification time; iterators return None.
+    """
+    digest = hashlib.sha256()
+    if isinstance(dataset, pd.DataFrame):
+        digest.update(repr((dataset.shape, [str(c) for c in dataset.columns], [str(t) for t in dataset.dtypes])).encode("utf-8"))
+        if len(dataset):
+            positions = np.unique(np.linspace(0, len(dataset) - 1, num=min(sample_rows, len(dataset))).astype("int64"))
+            try:
+                hashes = pd.util.hash_pandas_object(dataset.iloc[positions], index=True)
+            except TypeError:
+                # Unhashable cell values (lists, dicts); skip caching.
+                return None
+            digest.update(hashes.to_numpy().tobytes())
+        return digest.hexdigest()
+    if isinstance(dataset, (str, os.PathLike)):
+        stat = os.stat(dataset)
+        digest.update(repr((os.path.abspath(dataset), stat.st_size, stat.st_mtime_ns)).encode("utf-8"))
+        return digest.hexdigest()
+    return None
+
+
+class ProfileCache:
+    """In-process LRU of dataset descriptions, shared by all pipelines."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Return ``(value, hit)``; concurrent misses on one key wait for a single ``compute()``."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._pending[key] = Future()
+                owner = True
+            else:
+                self.hits += 1
+                owner = False
+        if not owner:
+            return pending.result(), True
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            pending.set_exception(e)
+            raise
+        self.set(key, value)
+        with self._lock:
+            del self._pending[key]
+        pending.set_result(value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+PROFILE_CACHE = ProfileCache()
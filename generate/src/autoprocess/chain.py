@@ -0,0 +1,135 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .tracing import count
+
+# Pipelines describe their strategy -> code -> validate -> refine flow as a generator
+# that yields prompts and receives model responses (or has the call's exception thrown
+# into it), so the same chain can be driven synchronously or on the event loop.
+# A chain may also yield a zero-argument callable for local work (e.g. dry-running
+# generated code); the driver runs it and sends back its result instead, or a FirstOf
+# to run several sub-chains concurrently and receive the first result that is not None.
+
+
+class FirstOf:
+    def __init__(self, chains):
+        self.chains = list(chains)
+
+
+def speculate(code_prompt, n, validate, passed, clean=str.strip):
+    """Chain step (``yield from``): request ``n`` code candidates at once and validate each one.
+
+    Yields to a FirstOf, so the first candidate that passes wins and the rest are
+    cancelled. Returns ``(code, None)`` for a winner; when none passes, the lowest-numbered
+    failing candidate and its validation response, so the chain refines it instead of
+    starting over; ``(None, None)`` when no candidate produced code at all.
+    """
+    count("candidates", n)
+    failures = {}
+
+    def candidate(i):
+        # Distinct prompts so response caching does not collapse the candidates into one.
+        code_response = yield f"{code_prompt}\n(Candidate {i + 1} of {n}: write an independent implementation.)"
+        if not code_response.text:
+            return None
+        code = clean(code_response.text)
+        validation_response = yield validate(code)
+        if validation_response.text and passed(validation_response):
+            return code
+        if validation_response.text:
+            failures[i] = (code, validation_response)
+        return None
+
+    winner = yield FirstOf(candidate(i) for i in range(n))
+    if winner is not None:
+        return winner, None
+    return failures[min(failures)] if failures else (None, None)
+
+
+def run_chain(chain, model, cancelled: threading.Event = None):
+    send, value = chain.send, None
+    while True:
+        if cancelled is not None and cancelled.is_set():
+            chain.close()
+            return None
+        try:
+            prompt = send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            if isinstance(prompt, FirstOf):
+                value = _first_of(prompt.chains, model)
+            else:
+                value = prompt() if callable(prompt) else model.generate_content(prompt)
+            send = chain.send
+        except Exception as e:
+            send, value = chain.throw, e
+
+
+def _first_of(chains, model):
+    cancelled = threading.Event()
+    pool = ThreadPoolExecutor(max(1, len(chains)))
+    futures = [pool.submit(contextvars.copy_context().run, run_chain, chain, model, cancelled) for chain in chains]
+    try:
+        for future in as_completed(futures):
+            if future.exception() is None and future.result() is not None:
+                return future.result()
+        return None
+    finally:
+        # Losing candidates stop before their next model call; in-flight calls are discarded.
+        cancelled.set()
+        # shutdown(cancel_futures=True) needs Python 3.9; cancel what has not started by hand.
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+async def run_blocking(func, *args, **kwargs):
+    # Carry context variables (e.g. the active trace) into the worker thread.
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+
+
+async def agenerate_content(model, prompt, **kwargs):
+    # Models without an async client (e.g. local stand-ins) run on the default executor.
+    generate_async = getattr(model, "generate_content_async", None)
+    if generate_async is None:
+        return await run_blocking(model.generate_content, prompt, **kwargs)
+    return await generate_async(prompt, **kwargs)
+
+
+async def arun_chain(chain, model):
+    send, value = chain.send, None
+    while True:
+        try:
+            prompt = send(value)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            if isinstance(prompt, FirstOf):
+                value = await _afirst_of(prompt.chains, model)
+            elif callable(prompt):
+                value = await run_blocking(prompt)
+            else:
+                value = await agenerate_content(model, prompt)
+            send = chain.send
+        except Exception as e:
+            send, value = chain.throw, e
+
+
+async def _afirst_of(chains, model):
+    pending = {asyncio.ensure_future(arun_chain(chain, model)) for chain in chains}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result() is not None:
+                    return task.result()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
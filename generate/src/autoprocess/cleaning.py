@@ -1,11 +1,42 @@
 from .helper import*
+from .memory import check_backend, optimize_dtypes, with_dtypes
+from .rules import check_engine, cleaning_plan, escalation_prompt, resolves_locally, with_local_strategy
+from .validation import LocalValidation, dry_run_sample, local_check
 
+SUFFIX_REQUIREMENT = "- Preserve original data by adding '_cleaned' suffix to transformed columns if applicable.\n"
+IN_PLACE_REQUIREMENT = (
+    "- Update cleaned columns in place (df[col] = ...) instead of adding suffixed copies.\n"
+    "- Avoid copying the whole DataFrame: no df.copy(), and drop rows once with a combined mask rather than per column.\n"
+)
+DTYPE_REQUIREMENT = (
+    "- Keep the memory-optimized dtypes shown in the dataset context: fill integer columns with whole numbers "
+    "(e.g. a rounded median), fill categoricals with an existing category, and never cast back to float64 or object.\n"
+)
+SUFFIX_CHECK = "- Clear column naming (e.g., '_cleaned' suffix) for transformed columns.\n"
+IN_PLACE_CHECK = "- Columns updated in place, without suffixed copies or whole-DataFrame copies.\n"
 
 
 class DataCleaningPipeline:
-    def __init__(self, api_key: str):
-        self.model = initialize_gemini(api_key)
-        if self.model is None:
+    def __init__(self, api_key: str = None, cache=None, model=None, strategy_engine: str = "llm", local_validation: bool = False,
+                 candidates: int = 1, prompt_tokens: int = PROMPT_TOKENS, scheduler=None, priority: int = 0,
+                 tracer=None, optimize_memory: bool = False, in_place: bool = False, dtype_backend: str = None):
+        self.strategy_engine = check_engine(strategy_engine)
+        # Validate by parsing and dry-running the code on a data sample instead of asking the model.
+        self.local_validation = local_validation
+        # With candidates > 1, code is requested that many times at once and the first passing one wins.
+        self.candidates = candidates
+        # Token budget for the dataset profile embedded in strategy prompts.
+        self.prompt_tokens = prompt_tokens
+        # Optional Tracer; public methods then return a run report with the code.
+        self.tracer = tracer
+        # Memory mode: shrink dtypes before profiling (results then carry a "memory" report),
+        # and/or overwrite columns in place instead of adding '_cleaned' copies.
+        self.optimize_memory = optimize_memory
+        self.in_place = in_place
+        self.dtype_backend = check_backend(dtype_backend)
+        self.model = prepare_model(load_model(model, api_key, self.strategy_engine), cache=cache,
+                                   scheduler=scheduler, priority=priority)
+        if self.model is None and self.strategy_engine != "local":
             print("API not valid")
         # Strategy prompt: Generate cleaning strategy for missing values, outliers, and duplicates.
         self.strategy_prompt = (
@@ -31,7 +62,8 @@ class DataCleaningPipeline:
             "- Detect and handle outliers using the suggested method (e.g., IQR filtering, winsorization).\n"
             "- Remove duplicate rows according to best practices.\n\n"
             "Requirements:\n"
-            "- Preserve original data by adding '_cleaned' suffix to transformed columns if applicable.\n"
+            f"{IN_PLACE_REQUIREMENT if in_place else SUFFIX_REQUIREMENT}"
+            f"{DTYPE_REQUIREMENT if optimize_memory else ''}"
             "- Include necessary imports and comments explaining each step.\n\n"
             "If any task is excluded from the strategy, ensure it is not included in the code.\n"
             "Output only the final Python code without any additional commentary."
@@ -42,69 +74,147 @@ class DataCleaningPipeline:
             "Validate the following Python code for data cleaning. Check for:\n"
             "- Correct handling of missing values, outliers, and duplicates (if applicable).\n"
             "- Proper use of function parameters and safety checks.\n"
-            "- Clear column naming (e.g., '_cleaned' suffix) for transformed columns.\n"
+            f"{IN_PLACE_CHECK if in_place else SUFFIX_CHECK}"
             "- Necessary imports and compatibility with sklearn pipelines if needed.\n\n"
             "If the code is production-ready, respond with 'production-ready' or 'no errors'. Otherwise, provide specific feedback for improvement."
         )
 
-    def data_clean(self, dataset, target: str = "", outlier=True, missing=True, duplicate=True) -> dict:
+    @traced("data_clean")
+    def data_clean(self, dataset, target: str = "", outlier=True, missing=True, duplicate=True, profile: dict = None) -> dict:
+        dataset, profile, memory = self._shrink(dataset, target, profile)
         # If the API key was invalid, self.model will be None.
-        dataset_description = gen_des(dataset)
+        dataset_description = describe_dataset(dataset, target=target, profile=profile)
+        plan = self._plan(dataset_description, target, outlier, missing, duplicate)
+        if resolves_locally(self.strategy_engine, plan):
+            return _with_memory({"code": plan.code}, memory)
         if not self.model:
             return {"error": "API not valid"}
+        sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+        return _with_memory(
+            run_chain(self._clean_chain(dataset_description, target, outlier, missing, duplicate, plan, sample), self.model),
+            memory
+        )
+
+    @traced("data_clean")
+    async def adata_clean(self, dataset, target: str = "", outlier=True, missing=True, duplicate=True, profile: dict = None) -> dict:
+        dataset, profile, memory = await run_blocking(self._shrink, dataset, target, profile)
+        dataset_description = await run_blocking(describe_dataset, dataset, target=target, profile=profile)
+        plan = self._plan(dataset_description, target, outlier, missing, duplicate)
+        if resolves_locally(self.strategy_engine, plan):
+            return _with_memory({"code": plan.code}, memory)
+        if not self.model:
+            return {"error": "API not valid"}
+        sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+        return _with_memory(
+            await arun_chain(self._clean_chain(dataset_description, target, outlier, missing, duplicate, plan, sample), self.model),
+            memory
+        )
+
+    def optimize_dtypes(self, dataset: pd.DataFrame, target: str = ""):
+        """Shrink ``dataset`` with this pipeline's settings; returns ``(frame, memory report)``."""
+        with span("optimize_memory", columns=len(dataset.columns)) as attributes:
+            optimized, memory = optimize_dtypes(dataset, exclude=[target] if has_target(target) else (), dtype_backend=self.dtype_backend)
+            attributes.update(before=memory["before"], after=memory["after"])
+        return optimized, memory
+
+    def _shrink(self, dataset, target, profile):
+        # Only in-memory frames can be re-typed; paths and chunk iterators pass through.
+        if not self.optimize_memory or not isinstance(dataset, pd.DataFrame):
+            return dataset, profile, None
+        optimized, memory = self.optimize_dtypes(dataset, target)
+        if profile is not None:
+            profile = with_dtypes(profile, memory["dtypes"])
+        return optimized, profile, memory
 
+    def _plan(self, dataset_description, target, outlier, missing, duplicate):
+        if self.strategy_engine == "llm":
+            return None
+        return cleaning_plan(dataset_description, target, outlier, missing, duplicate, in_place=self.in_place)
+
+    def _clean_chain(self, dataset_description, target, outlier, missing, duplicate, plan=None, sample=None):
         # --- Strategy Generation ---
         combined_strategy_prompt = "\n".join([
             self.strategy_prompt,
-            f"Dataset Context: {dataset_description}",
-            f"Target Variable: {target}" if target else "",
-            f"Tasks to include: {'Missing Values' if missing else ''}, {'Outliers' if outlier else ''}, {'Duplicates' if duplicate else ''}"
+            f"Dataset Context:\n{compact_description(dataset_description, target, plan.ambiguous if plan else (), self.prompt_tokens)}",
+            f"Target Variable: {target}" if has_target(target) else "",
+            f"Tasks to include: {'Missing Values' if missing else ''}, {'Outliers' if outlier else ''}, {'Duplicates' if duplicate else ''}",
+            escalation_prompt(plan) if plan else ""
         ])
-        strategy_response = self.model.generate_content(combined_strategy_prompt)
+        strategy_response = yield combined_strategy_prompt
         if not strategy_response.text:
             raise ValueError("Failed to generate a cleaning strategy.")
-        strategy_text = strategy_response.text.strip()
+        strategy_text = with_local_strategy(plan, strategy_response.text.strip())
 
         # --- Code Generation ---
         combined_code_prompt = "\n".join([
             self.code_prompt,
             f"Strategy: {strategy_text}"
         ])
-        code_response = self.model.generate_content(combined_code_prompt)
-        if not code_response.text:
-            raise ValueError("Failed to generate cleaning code.")
-        current_code = code_response.text.strip()
-        if "import" in current_code:
-            current_code = current_code[current_code.index("import"):]
+        current_code = validation_response = None
+        if self.candidates > 1:
+            # Without a winner, refinement starts from a failed candidate and its feedback.
+            current_code, validation_response = yield from speculate(
+                combined_code_prompt, self.candidates, lambda code: self._validation_step(code, sample), self._passed, _trim)
+            if current_code is not None and validation_response is None:
+                return {"code": current_code}
+        if current_code is None:
+            code_response = yield combined_code_prompt
+            if not code_response.text:
+                raise ValueError("Failed to generate cleaning code.")
+            current_code = _trim(code_response.text)
 
         # --- Iterative Validation Loop (silently refine until production-ready) ---
         iteration = 0
         max_iterations = 3
         while iteration < max_iterations:
-            combined_val_prompt = "\n".join([self.validation_prompt, current_code])
-            validation_response = self.model.generate_content(combined_val_prompt)
+            if validation_response is None:
+                validation_response = yield self._validation_step(current_code, sample)
             if not validation_response.text:
                 raise ValueError("Failed to validate the generated cleaning code.")
-            feedback = validation_response.text.lower()
 
             # Exit loop if the code is production-ready
-            if "production-ready" in feedback or "no errors" in feedback:
+            if self._passed(validation_response):
                 break
-            else:
-                refinement_prompt = "\n".join([
-                    f"Feedback: {validation_response.text}",
-                    "Refine the Python code accordingly. Output only the refined Python code without any additional commentary.",
-                    f"Current Code:\n{current_code}"
-                ])
-                refinement_response = self.model.generate_content(refinement_prompt)
-                if not refinement_response.text:
-                    raise ValueError("Failed to refine the cleaning code after feedback.")
-                current_code = refinement_response.text.strip()
-                if "import" in current_code:
-                    current_code = current_code[current_code.index("import"):]
-                iteration += 1
+            refinement_prompt = "\n".join([
+                f"Feedback: {validation_response.text}",
+                "Refine the Python code accordingly. Output only the refined Python code without any additional commentary.",
+                f"Current Code:\n{current_code}"
+            ])
+            refinement_response = yield refinement_prompt
+            if not refinement_response.text:
+                raise ValueError("Failed to refine the cleaning code after feedback.")
+            current_code = _trim(refinement_response.text)
+            validation_response = None
+            count("refine_iterations")
+            iteration += 1
 
         return {"code": current_code}
+
+    def _validation_step(self, code, sample):
+        if sample is not None:
+            return local_check(code, sample, None if self.in_place else "_cleaned")
+        return "\n".join([self.validation_prompt, code])
+
+    def _passed(self, validation_response) -> bool:
+        if isinstance(validation_response, LocalValidation):
+            return validation_response.ok
+        feedback = validation_response.text.lower()
+        return "production-ready" in feedback or "no errors" in feedback
+
+
+def _with_memory(result: dict, memory: dict) -> dict:
+    # The dtype conversion runs first, so the cleaning code sees the dtypes it was written for.
+    if memory is None or "code" not in result:
+        return result
+    report = {key: value for key, value in memory.items() if key != "code"}
+    return dict(result, code=memory["code"] + result["code"], memory=report)
+
+
+def _trim(text: str) -> str:
+    code = text.strip()
+    if "import" in code:
+        code = code[code.index("import"):]
+    return code
     
     
 
@@ -0,0 +1,266 @@
+import ast
+import pickle
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from .helper import extract_code
+
+# Generated code refits scalers/encoders and recomputes medians, quantiles, etc. every
+# time it runs. GeneratedTransformer rewrites those call sites so that fit() records
+# what they learned and transform() replays it on new batches without refitting.
+# Function and lambda bodies are left as written: they run once per call on their own
+# arguments (e.g. df.apply(lambda row: ...) or narrow_column checking the batch at hand).
+
+FIT_METHODS = {"fit", "fit_transform"}
+STAT_METHODS = {
+    "mean", "median", "mode", "std", "var", "quantile", "min", "max", "sum", "count",
+    "unique", "nunique", "value_counts", "idxmax", "idxmin",
+}
+NUMPY_STATS = {
+    "mean", "median", "std", "var", "percentile", "quantile", "min", "max", "amin", "amax",
+    "nanmean", "nanmedian", "nanstd", "nanvar", "nanpercentile", "nanquantile", "nanmin", "nanmax",
+}
+POWER_FUNCTIONS = {"boxcox", "yeojohnson"}
+# pandas calls whose output columns or bin edges depend on the batch.
+BIN_FUNCTIONS = {"cut", "qcut"}
+# Window operations are row-wise; their aggregates must be recomputed per batch.
+ROW_WISE = {"rolling", "expanding", "ewm", "resample", "shift", "diff"}
+# Element-wise accessors: df[c].str.count(...) is not an aggregate.
+ACCESSORS = {"str", "dt", "cat"}
+STATE_NAME = "__fit_state__"
+
+
+def _literal(node):
+    # Python 3.7 parses literals as ast.Num / ast.Str rather than ast.Constant.
+    if isinstance(node, ast.Constant):
+        return node.value
+    if type(node).__name__ in ("Num", "Str"):
+        return getattr(node, "n", getattr(node, "s", None))
+    return None
+
+
+def _is_axis_1(node) -> bool:
+    return _literal(node) in (1, "columns")
+
+
+def _is_row_wise(call: ast.Call, on_numpy: bool = False) -> bool:
+    for keyword in call.keywords:
+        if keyword.arg == "axis" and _is_axis_1(keyword.value):
+            return True
+    # A positional axis: np.mean(x, 1), np.percentile(x, q, 1), df.mean(1), df.quantile(q, 1).
+    name = call.func.attr if isinstance(call.func, ast.Attribute) else None
+    position = int(on_numpy) + int(name in ("quantile", "percentile", "nanpercentile", "nanquantile"))
+    if len(call.args) > position and _is_axis_1(call.args[position]):
+        return True
+    receiver = call.func.value if isinstance(call.func, ast.Attribute) else None
+    if isinstance(receiver, ast.Attribute) and receiver.attr in ACCESSORS:
+        return True
+    while isinstance(receiver, (ast.Call, ast.Attribute, ast.Subscript)):
+        if isinstance(receiver, ast.Call) and isinstance(receiver.func, ast.Attribute) and receiver.func.attr in ROW_WISE:
+            return True
+        receiver = receiver.func if isinstance(receiver, ast.Call) else receiver.value
+    return False
+
+
+def _state_call(method: str, site: str, args: list, keywords: list) -> ast.Call:
+    return ast.Call(
+        func=ast.Attribute(value=ast.Name(id=STATE_NAME, ctx=ast.Load()), attr=method, ctx=ast.Load()),
+        args=[ast.Constant(value=site)] + args,
+        keywords=keywords,
+    )
+
+
+class _Freezer(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        return node
+
+    visit_AsyncFunctionDef = visit_Lambda = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call):
+        self.generic_visit(node)
+        func = node.func
+        site = f"{node.lineno}:{node.col_offset}"
+        if isinstance(func, ast.Attribute) and func.attr in FIT_METHODS:
+            return _state_call("estimator", site, [func.value, ast.Constant(value=func.attr)] + node.args, node.keywords)
+        name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else None
+        if name in POWER_FUNCTIONS and len(node.args) == 1 and not node.keywords:
+            return _state_call("power", site, [func] + node.args, [])
+        on_pandas = isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id in ("pd", "pandas")
+        if on_pandas and name == "get_dummies":
+            return _state_call("dummies", site, [func] + node.args, node.keywords)
+        if on_pandas and name in BIN_FUNCTIONS:
+            return _state_call("bins", site, [func, ast.Constant(value=name)] + node.args, node.keywords)
+        is_stat = on_numpy = False
+        if isinstance(func, ast.Attribute):
+            on_numpy = isinstance(func.value, ast.Name) and func.value.id in ("np", "numpy")
+            is_stat = func.attr in NUMPY_STATS if on_numpy else func.attr in STAT_METHODS
+        if is_stat and not _is_row_wise(node, on_numpy):
+            thunk = ast.parse("lambda: None", mode="eval").body
+            thunk.body = node
+            return _state_call("stat", site, [thunk], [])
+        return node
+
+
+class _FitState:
+    def __init__(self, records: dict = None):
+        self.fitting = records is None
+        self.records = {} if records is None else records
+        self._counts = {}
+
+    def _key(self, site):
+        n = self._counts.get(site, 0)
+        self._counts[site] = n + 1
+        return site, n
+
+    def _missing(self, key):
+        warnings.warn(f"Call site {key} was not seen during fit; computing it on this batch.")
+
+    def estimator(self, site, receiver, method, *args, **kwargs):
+        key = self._key(site)
+        if self.fitting:
+            result = getattr(receiver, method)(*args, **kwargs)
+            self.records[key] = ("estimator", receiver) if method == "fit_transform" or result is receiver else ("value", result)
+            return result
+        if key not in self.records:
+            self._missing(key)
+            return getattr(receiver, method)(*args, **kwargs)
+        kind, fitted = self.records[key]
+        if kind == "value":
+            return fitted
+        if receiver is not fitted and hasattr(receiver, "__dict__"):
+            # Later statements may use the variable that held the unfitted object.
+            receiver.__dict__.update(fitted.__dict__)
+        return fitted.transform(*args[:1]) if method == "fit_transform" else receiver
+
+    def stat(self, site, compute):
+        key = self._key(site)
+        if self.fitting:
+            self.records[key] = compute()
+            return self.records[key]
+        if key not in self.records:
+            self._missing(key)
+            return compute()
+        return self.records[key]
+
+    def power(self, site, func, values):
+        key = self._key(site)
+        if self.fitting:
+            transformed, lmbda = func(values)
+            self.records[key] = lmbda
+            return transformed, lmbda
+        if key not in self.records:
+            self._missing(key)
+            return func(values)
+        return func(values, lmbda=self.records[key]), self.records[key]
+
+    def dummies(self, site, func, *args, **kwargs):
+        # Categories missing from a batch become all-zero columns; unseen ones are dropped.
+        key = self._key(site)
+        result = func(*args, **kwargs)
+        if self.fitting:
+            self.records[key] = (list(result.columns), result.dtypes.to_dict())
+            return result
+        if key not in self.records:
+            self._missing(key)
+            return result
+        columns, dtypes = self.records[key]
+        unseen = [col for col in result.columns if col not in dtypes]
+        if unseen:
+            warnings.warn(f"get_dummies at {key} produced columns not seen during fit; dropping {unseen[:10]}")
+        result = result.reindex(columns=columns)
+        for col in columns:
+            if result[col].isna().all() and dtypes[col] != result[col].dtype:
+                result[col] = np.zeros(len(result), dtype=dtypes[col]) if isinstance(dtypes[col], np.dtype) else 0
+        return result
+
+    def bins(self, site, func, name, x, spec=None, **kwargs):
+        # Bin edges from fit are reused, so a value lands in the same bin in every batch.
+        key = self._key(site)
+        spec = spec if spec is not None else kwargs.pop("q" if name == "qcut" else "bins")
+        retbins = kwargs.pop("retbins", False)
+        if self.fitting:
+            result, edges = func(x, spec, retbins=True, **kwargs)
+            self.records[key] = edges
+            return (result, edges) if retbins else result
+        if key not in self.records:
+            self._missing(key)
+            return func(x, spec, retbins=retbins, **kwargs)
+        edges = self.records[key]
+        if name == "qcut":
+            kwargs["include_lowest"] = True
+        result = pd.cut(x, edges, **kwargs)
+        return (result, edges) if retbins else result
+
+
+class GeneratedTransformer(BaseEstimator, TransformerMixin):
+    """sklearn-compatible wrapper around pipeline-generated code operating on ``df``."""
+
+    def __init__(self, code: str, copy: bool = True):
+        self.code = code
+        self.copy = copy
+
+    def _compiled(self):
+        if getattr(self, "_program", None) is None:
+            tree = ast.fix_missing_locations(_Freezer().visit(ast.parse(extract_code(self.code))))
+            self._program = compile(tree, "<generated>", "exec")
+        return self._program
+
+    def _run(self, X: pd.DataFrame, state: _FitState) -> pd.DataFrame:
+        namespace = {"df": X.copy() if self.copy else X, STATE_NAME: state}
+        exec(self._compiled(), namespace)
+        return namespace["df"]
+
+    def fit(self, X: pd.DataFrame, y=None):
+        self.fit_transform(X, y)
+        return self
+
+    def fit_transform(self, X: pd.DataFrame, y=None, **fit_params) -> pd.DataFrame:
+        state = _FitState()
+        result = self._run(X, state)
+        self.state_ = state.records
+        self.feature_names_in_ = list(map(str, X.columns))
+        self.feature_names_out_ = list(map(str, result.columns))
+        return result
+
+    def transform(self, X: pd.DataFrame) -> pd.DataFrame:
+        if not hasattr(self, "state_"):
+            raise ValueError("GeneratedTransformer is not fitted yet; call fit() first")
+        result = self._run(X, _FitState(self.state_))
+        names = list(map(str, result.columns))
+        if names == self.feature_names_out_:
+            return result
+        missing = [col for col in self.feature_names_out_ if col not in set(names)]
+        unexpected = [col for col in names if col not in set(self.feature_names_out_)]
+        if missing or unexpected:
+            warnings.warn(f"Output columns differ from fit (missing {missing[:10]}, unexpected {unexpected[:10]}); "
+                          "reindexing to the fitted columns.")
+        return result.set_axis(names, axis=1).reindex(columns=self.feature_names_out_)
+
+    def get_feature_names_out(self, input_features=None):
+        return list(self.feature_names_out_)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_program", None)
+        return state
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def load(cls, path: str) -> "GeneratedTransformer":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def compile_code(result, copy: bool = True) -> GeneratedTransformer:
+    """Build a transformer from a pipeline result: ``{"code": ...}`` or a bare code string."""
+    if isinstance(result, dict):
+        if "error" in result:
+            raise ValueError(f"Cannot compile a failed pipeline result: {result['error']}")
+        result = result["code"]
+    return GeneratedTransformer(result, copy=copy)
@@ -0,0 +1,33 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+
+async def arun_all(tasks, max_concurrency: int = 4, return_exceptions: bool = False) -> list:
+    """Run independent pipeline stages concurrently, at most ``max_concurrency`` at a time.
+
+    ``tasks`` are zero-argument callables returning awaitables (so nothing starts before
+    it gets a slot), e.g. ``functools.partial(cleaner.adata_clean, df, target="y")``.
+    Results come back in input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(task):
+        async with semaphore:
+            return await (task() if callable(task) else task)
+
+    return await asyncio.gather(*(run(task) for task in tasks), return_exceptions=return_exceptions)
+
+
+def run_all(tasks, max_concurrency: int = 4, return_exceptions: bool = False) -> list:
+    """Blocking wrapper around :func:`arun_all` for scripts and batch jobs."""
+    coroutine = arun_all(tasks, max_concurrency=max_concurrency, return_exceptions=return_exceptions)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Called from inside a running loop (e.g. a Jupyter cell): asyncio.run would raise,
+    # so the tasks get their own loop on a worker thread, keeping the caller's context.
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(1) as pool:
+        return pool.submit(context.run, asyncio.run, coroutine).result()
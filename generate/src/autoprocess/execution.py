@@ -0,0 +1,203 @@
+import glob
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from .compiled import GeneratedTransformer, compile_code
+from .sketch import ReservoirSample
+from .streaming import iter_chunks
+
+# Applies pipeline-generated code to datasets that do not fit in memory: fit once on a
+# bounded sample, then transform chunk by chunk across a process pool, streaming every
+# chunk straight back out to disk.
+
+_WORKER_TRANSFORMER = None
+
+
+def _init_worker(payload: bytes):
+    global _WORKER_TRANSFORMER
+    _WORKER_TRANSFORMER = pickle.loads(payload)
+
+
+def _require_pyarrow(reason: str):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(f"{reason} requires 'pyarrow' (pip install autoprocess_iitg[parquet])") from e
+
+
+def _transform_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    return _WORKER_TRANSFORMER.transform(chunk)
+
+
+class _Writer:
+    def __init__(self, path: str, output_format: str, columns: list = None):
+        self.path = path
+        self.output_format = output_format
+        # Every chunk is written with the same columns: the fitted output schema, or the
+        # first chunk's when none is known.
+        self.columns = list(columns) if columns is not None else None
+        self.rows = 0
+        self._parquet = None
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, frame: pd.DataFrame):
+        frame = self._conform(frame)
+        if self.output_format == "parquet":
+            _require_pyarrow("Writing Parquet output")
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            frame.to_csv(self.path, mode="a", header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def _conform(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.set_axis([str(col) for col in frame.columns], axis=1)
+        if self.columns is None:
+            self.columns = list(frame.columns)
+        unexpected = [col for col in frame.columns if col not in set(self.columns)]
+        if unexpected:
+            raise ValueError(f"Chunk produced columns outside the output schema: {unexpected[:10]}")
+        return frame.reindex(columns=self.columns)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def _transform_partition(source: str, target: str, chunksize: int, output_format: str, columns: list = None) -> dict:
+    writer = _Writer(target, output_format, columns)
+    try:
+        for chunk in iter_chunks(source, chunksize=chunksize):
+            writer.write(_WORKER_TRANSFORMER.transform(chunk))
+    finally:
+        writer.close()
+    return {"source": source, "output": target, "rows": writer.rows}
+
+
+def list_partitions(inputs) -> List[str]:
+    """Expand a directory, glob pattern, path or list of paths into CSV/Parquet partitions."""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [os.fspath(inputs)]
+    paths = []
+    for item in inputs:
+        item = os.fspath(item)
+        if os.path.isdir(item):
+            paths.extend(sorted(
+                p for p in glob.glob(os.path.join(item, "*"))
+                if p.endswith((".csv", ".parquet", ".pq"))
+            ))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    return paths
+
+
+class ChunkedExecutor:
+    """Run generated preprocessing code over partitioned CSV/Parquet data.
+
+    ``fit`` learns the code's state (scalers, encoders, imputation values) on a uniform
+    sample of ``fit_rows`` rows across all partitions; ``run`` then applies it with
+    ``max_workers`` processes, holding roughly one chunk per worker in memory. Every
+    output file gets the fitted output columns. Parquet input or output needs ``pyarrow``
+    (the ``parquet`` extra); ``output_format="csv"`` works without it.
+    """
+
+    def __init__(self, code, max_workers: int = None, chunksize: int = 100_000, fit_rows: int = 100_000):
+        self.transformer = code if isinstance(code, GeneratedTransformer) else compile_code(code)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.fit_rows = fit_rows
+
+    def fit(self, source):
+        if isinstance(source, (str, os.PathLike, list)):
+            chunks = _iter_many(list_partitions(source), self.chunksize)
+        else:
+            chunks = iter_chunks(source, chunksize=self.chunksize)
+        self.transformer.fit(_reservoir_rows(chunks, self.fit_rows))
+        return self
+
+    def run(self, inputs, output_dir: str, output_format: str = "parquet") -> List[dict]:
+        if not hasattr(self.transformer, "state_"):
+            raise ValueError("ChunkedExecutor is not fitted yet; call fit() first")
+        if output_format not in ("parquet", "csv"):
+            raise ValueError("output_format must be 'parquet' or 'csv'")
+        os.makedirs(output_dir, exist_ok=True)
+        partitions = list_partitions(inputs)
+        if not partitions:
+            raise ValueError(f"No CSV/Parquet partitions found in {inputs!r}")
+        # Fail before the process pool starts rather than in every worker.
+        if output_format == "parquet":
+            _require_pyarrow("output_format='parquet'")
+        elif any(path.endswith((".parquet", ".pq")) for path in partitions):
+            _require_pyarrow("Reading Parquet partitions")
+        payload = pickle.dumps(self.transformer)
+        extension = ".parquet" if output_format == "parquet" else ".csv"
+
+        with ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(payload,)) as pool:
+            if len(partitions) == 1:
+                # One large file: the parent streams chunks to the pool and writes them in order.
+                target = os.path.join(output_dir, _stem(partitions[0]) + extension)
+                return [self._run_single(pool, partitions[0], target, output_format)]
+            futures = [
+                pool.submit(_transform_partition, path, os.path.join(output_dir, _stem(path) + extension),
+                            self.chunksize, output_format, self.transformer.feature_names_out_)
+                for path in partitions
+            ]
+            return [future.result() for future in futures]
+
+    def _run_single(self, pool, source: str, target: str, output_format: str) -> dict:
+        writer = _Writer(target, output_format, self.transformer.feature_names_out_)
+        pending = deque()
+        try:
+            for chunk in iter_chunks(source, chunksize=self.chunksize):
+                pending.append(pool.submit(_transform_chunk, chunk))
+                # Bound in-flight chunks so memory does not grow with the file size.
+                if len(pending) >= 2 * self.max_workers:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+        finally:
+            writer.close()
+        return {"source": source, "output": target, "rows": writer.rows}
+
+
+def _reservoir_rows(chunks, size: int) -> pd.DataFrame:
+    # Sorted or partitioned data would bias a head-of-stream sample, so rows are drawn
+    # uniformly from the whole stream, keeping at most `size` of them in memory.
+    reservoir = ReservoirSample(size)
+    sample = None
+    for chunk in chunks:
+        chosen = reservoir.select(len(chunk))
+        if not chosen:
+            continue
+        slots = np.array([slot for slot, _ in chosen])
+        rows = chunk.iloc[[pos for _, pos in chosen]]
+        current = 0 if sample is None else len(sample)
+        combined = rows.reset_index(drop=True) if sample is None else pd.concat([sample, rows], ignore_index=True)
+        order = np.arange(max(current, slots.max() + 1))
+        order[slots] = current + np.arange(len(chosen))
+        sample = combined.iloc[order].reset_index(drop=True)
+    if sample is None:
+        raise ValueError("No rows to fit on")
+    return sample
+
+
+def _iter_many(paths: List[str], chunksize: int):
+    for path in paths:
+        yield from iter_chunks(path, chunksize=chunksize)
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
@@ -1,9 +1,29 @@
+import functools
+import json
+import re
+
+from .concurrency import arun_all, run_all
 from .helper import*
+from .rules import check_engine, escalation_prompt, feature_plan, resolves_locally, with_local_strategy
+from .sharding import column_shards, merge_shards, shard_context, shard_description
+from .validation import LocalValidation, dry_run_sample, local_check
 
 class FeatureEngineeringPipeline:
-    def __init__(self, api_key: str):
-        self.model = initialize_gemini(api_key)
-        if self.model is None:
+    def __init__(self, api_key: str = None, cache=None, model=None, strategy_engine: str = "llm", local_validation: bool = False,
+                 candidates: int = 1, prompt_tokens: int = PROMPT_TOKENS, scheduler=None, priority: int = 0,
+                 tracer=None):
+        self.strategy_engine = check_engine(strategy_engine)
+        # Validate by parsing and dry-running the code on a data sample instead of asking the model.
+        self.local_validation = local_validation
+        # With candidates > 1, code is requested that many times at once and the first passing one wins.
+        self.candidates = candidates
+        # Token budget for the dataset profile embedded in strategy prompts.
+        self.prompt_tokens = prompt_tokens
+        # Optional Tracer; public methods then return a run report with the code.
+        self.tracer = tracer
+        self.model = prepare_model(load_model(model, api_key, self.strategy_engine), cache=cache,
+                                   scheduler=scheduler, priority=priority)
+        if self.model is None and self.strategy_engine != "local":
             raise ValueError("Invalid API key")
         
         # Strategy prompt template
@@ -48,66 +68,143 @@ class FeatureEngineeringPipeline:
             "Respond 'VALID' or list specific improvements."
         )
 
-    def generate_features(self, dataset, target: str, drop_columns: bool = True, max_iterations: int = 3) -> dict:
+    @traced("generate_features")
+    def generate_features(self, dataset, target: str, drop_columns: bool = True, max_iterations: int = 3, profile: dict = None,
+                          shard_size: int = None, max_concurrency: int = 8) -> dict:
         
-        dataset_description = gen_des(dataset)
+        dataset_description = describe_dataset(dataset, target=target, profile=profile)
+        if shard_size and len(dataset_description["columns"]) > shard_size:
+            sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+            shards, tasks = self._shard_tasks(dataset_description, target, drop_columns, max_iterations, sample, shard_size)
+            return merge_shards(run_all(tasks, max_concurrency=max_concurrency), shards, target)
+        plan = feature_plan(dataset_description, target, drop_columns) if self.strategy_engine != "llm" else None
+        if resolves_locally(self.strategy_engine, plan):
+            return {"code": plan.code}
         if not self.model:
             return {"error": "API not valid"}
-        
+        sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+        return run_chain(self._feature_chain(dataset_description, target, drop_columns, max_iterations, plan, sample), self.model)
+
+    @traced("generate_features")
+    async def agenerate_features(self, dataset, target: str, drop_columns: bool = True, max_iterations: int = 3, profile: dict = None,
+                                 shard_size: int = None, max_concurrency: int = 8) -> dict:
+        dataset_description = await run_blocking(describe_dataset, dataset, target=target, profile=profile)
+        if shard_size and len(dataset_description["columns"]) > shard_size:
+            sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+            shards, tasks = self._shard_tasks(dataset_description, target, drop_columns, max_iterations, sample, shard_size)
+            return merge_shards(await arun_all(tasks, max_concurrency=max_concurrency), shards, target)
+        plan = feature_plan(dataset_description, target, drop_columns) if self.strategy_engine != "llm" else None
+        if resolves_locally(self.strategy_engine, plan):
+            return {"code": plan.code}
+        if not self.model:
+            return {"error": "API not valid"}
+        sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+        return await arun_chain(self._feature_chain(dataset_description, target, drop_columns, max_iterations, plan, sample), self.model)
+
+    def _shard_tasks(self, dataset_description, target, drop_columns, max_iterations, sample, shard_size):
+        # Each shard is planned and coded on its own slice of the profile (plus the target).
+        shards = column_shards(dataset_description, shard_size, target)
+        defer_drops = ("List columns to remove under columns_to_drop but do not drop them in the code; "
+                       "they are dropped after all shards have run.") if drop_columns else ""
+        tasks = [
+            functools.partial(self._agenerate_shard, shard_description(dataset_description, columns, target), target,
+                              drop_columns, max_iterations, sample,
+                              "\n".join([shard_context(i, len(shards), columns, target), defer_drops]))
+            for i, columns in enumerate(shards)
+        ]
+        return shards, tasks
+
+    async def _agenerate_shard(self, dataset_description, target, drop_columns, max_iterations, sample, context):
+        plan = feature_plan(dataset_description, target, drop_columns) if self.strategy_engine != "llm" else None
+        if resolves_locally(self.strategy_engine, plan):
+            return {"code": plan.code, "strategy": json.dumps(plan.strategy, default=str)}
+        if not self.model:
+            return {"error": "API not valid"}
+        return await arun_chain(
+            self._feature_chain(dataset_description, target, drop_columns, max_iterations, plan, sample, context),
+            self.model
+        )
+
+    def _feature_chain(self, dataset_description, target, drop_columns, max_iterations, plan=None, sample=None, context=""):
         try:
             # Generate strategy
-            strategy_response = self.model.generate_content([
+            strategy_response = yield [
                 self.strategy_prompt,
-                f"Dataset Context: {dataset_description}",
+                f"Dataset Context:\n{compact_description(dataset_description, target, plan.ambiguous if plan else (), self.prompt_tokens)}",
                 f"Target Variable: {target}",
-                "Remove irrelevant columns: Yes" if drop_columns else ""
-            ])
+                "Remove irrelevant columns: Yes" if drop_columns else "",
+                escalation_prompt(plan) if plan else "",
+                context
+            ]
             
             if not strategy_response.text:
                 return {"error": "Failed to generate strategy"}
             
-            strategy = strategy_response.text.strip()
+            strategy = with_local_strategy(plan, strategy_response.text.strip())
 
             # Generate initial code
-            code_response = self.model.generate_content(
-                self.code_prompt.format(strategy=strategy)
-            )
-            
-            if not code_response.text:
-                return {"error": "Failed to generate initial code"}
-            
-            current_code = code_response.text
-            if "import" in current_code:
-                current_code = current_code[current_code.index("import"):]
+            code_prompt = self.code_prompt.format(strategy=strategy)
+            current_code = validation_response = None
+            if self.candidates > 1:
+                # Without a winner, refinement starts from a failed candidate and its feedback.
+                current_code, validation_response = yield from speculate(
+                    code_prompt, self.candidates, lambda code: self._validation_step(code, sample), self._passed, _trim)
+                if current_code is not None and validation_response is None:
+                    return {"code": current_code, "strategy": strategy}
+            if current_code is None:
+                code_response = yield code_prompt
+
+                if not code_response.text:
+                    return {"error": "Failed to generate initial code"}
+
+                current_code = _trim(code_response.text)
 
             # Refinement loop
             iteration = 0
             while iteration < max_iterations:
                 # Validate code
-                validation_response = self.model.generate_content(
-                    self.validation_prompt.format(code=current_code)
-                )
+                if validation_response is None:
+                    validation_response = yield self._validation_step(current_code, sample)
                 
                 if not validation_response.text:
                     break
                 
-                feedback = validation_response.text.lower()
-                if "valid" in feedback:
+                if self._passed(validation_response):
                     break
 
                 # Refine code
-                refinement_response = self.model.generate_content([
+                refinement_response = yield [
                     f"Refinement Instructions: {validation_response.text}",
                     "Current Code:\n" + current_code,
                     "Output only the improved code without comments:"
-                ])
+                ]
                 
                 if refinement_response.text:
                     current_code = refinement_response.text.strip()
+                validation_response = None
                 
+                count("refine_iterations")
                 iteration += 1
 
-            return {"code": current_code}
+            return {"code": current_code, "strategy": strategy}
 
         except Exception as e:
             return {"error": f"Pipeline failed: {str(e)}"}
+
+    def _validation_step(self, code, sample):
+        if sample is not None:
+            return local_check(code, sample, "_engineered")
+        return self.validation_prompt.format(code=code)
+
+    def _passed(self, validation_response) -> bool:
+        if isinstance(validation_response, LocalValidation):
+            return validation_response.ok
+        # "invalid" / "not valid" contain "valid"; match the verdict as a word.
+        feedback = validation_response.text.lower()
+        return bool(re.search(r"\bvalid\b", feedback)) and not re.search(r"\b(invalid|not valid)\b", feedback)
+
+
+def _trim(text: str) -> str:
+    if "import" in text:
+        text = text[text.index("import"):]
+    return text
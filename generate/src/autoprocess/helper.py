@@ -1,65 +1,433 @@
-import google.generativeai as genai
 import pandas as pd
-import torch
 import numpy as np
 import os
+import re
+import threading
 
+from .cache import PROFILE_CACHE, CachedModel, dataset_fingerprint
+from .chain import arun_chain, run_blocking, run_chain, speculate
+from .scheduler import SCHEDULER, ScheduledModel
+from .tracing import TracedModel, count, span, timed, traced
 
-def gen_des(df: pd.DataFrame, sample_size=2) -> dict:
-   
+
+
+def has_target(target) -> bool:
+    # Column names can be falsy (e.g. 0); only None and "" mean "no target".
+    return target is not None and target != ""
+
+
+def _is_categorical(col_data: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(col_data) or isinstance(col_data.dtype, pd.CategoricalDtype)
+
+
+def column_moments(arr: np.ndarray) -> dict:
+    # Batch reductions over a 2-D float block (rows x columns), NaN treated as missing.
+    mask = ~np.isnan(arr)
+    count = mask.sum(axis=0)
+    filled = np.where(mask, arr, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / count
+        dev = np.where(mask, arr - mean, 0.0)
+        m2 = (dev ** 2).sum(axis=0)
+        m3 = (dev ** 3).sum(axis=0)
+    return {
+        "count": count.astype("float64"),
+        "mean": mean,
+        "m2": m2,
+        "m3": m3,
+        "min": np.where(mask, arr, np.inf).min(axis=0) if len(arr) else np.full(arr.shape[1], np.inf),
+        "max": np.where(mask, arr, -np.inf).max(axis=0) if len(arr) else np.full(arr.shape[1], -np.inf),
+    }
+
+
+def finalize_moments(moments: dict) -> dict:
+    # Sample std (ddof=1) and adjusted Fisher-Pearson skew, matching pandas.
+    n, m2, m3 = moments["count"], moments["m2"], moments["m3"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(m2 / (n - 1))
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * (m3 / n) / (m2 / n) ** 1.5
+    skew = np.where((n > 2) & (m2 == 0), 0.0, skew)
+    skew = np.where(n > 2, skew, np.nan)
+    return {"min": moments["min"], "max": moments["max"], "mean": moments["mean"], "std": std, "skew": skew}
+
+
+def _round(value, digits=2):
+    return round(float(value), digits)
+
+
+def _numeric_stats(df: pd.DataFrame, numeric_cols: list, block_size: int = 256) -> dict:
+    stats = {}
+    for start in range(0, len(numeric_cols), block_size):
+        block = numeric_cols[start:start + block_size]
+        with timed("phases", "numeric_block"):
+            arr = df[block].to_numpy(dtype="float64", na_value=np.nan)
+            final = finalize_moments(column_moments(arr))
+        count = (~np.isnan(arr)).sum(axis=0)
+        for i, col in enumerate(block):
+            has_data = count[i] > 0
+            stats[col] = {
+                "min": _round(final["min"][i]) if has_data else None,
+                "max": _round(final["max"][i]) if has_data else None,
+                "mean": _round(final["mean"][i]) if has_data else None,
+                "std": _round(final["std"][i]) if has_data else None,
+                "skew": _round(final["skew"][i]) if count[i] > 1 else None,
+            }
+    return stats
+
+
+def _example_values(df: pd.DataFrame, n_examples: int = 5, pool_size: int = 1000) -> dict:
+    # Draw one shared random pool of rows instead of sampling every column separately.
+    pool_idx = np.random.RandomState(42).permutation(len(df))[:pool_size]
+    pool = df.iloc[pool_idx]
+    examples = {}
+    for col in df.columns:
+        values = pool[col].dropna()
+        if len(values) < n_examples and len(pool) < len(df):
+            values = df[col].dropna()
+            values = values.sample(min(n_examples, len(values)), random_state=42)
+        examples[col] = values.head(n_examples).tolist()
+    return examples
+
+
+def _distribution(top: list, total: int) -> dict:
+    return {
+        "top_values": [value for value, _ in top],
+        "percentages": [round(float(count) / int(total) * 100, 1) for _, count in top]
+    }
+
+
+def _pairwise_corr(x: np.ndarray, mask: np.ndarray, start: int, stop: int, complete: bool) -> np.ndarray:
+    # Pearson r of columns start:stop against all columns; each pair uses only the rows
+    # where both are present, with that pair's own means and variances. `x` is zero-filled.
+    block = x[:, start:stop]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if complete:
+            norms = np.sqrt((x ** 2).sum(axis=0))
+            return (block.T @ x) / np.outer(norms[start:stop], norms)
+        block_mask = mask[:, start:stop]
+        n = block_mask.T @ mask
+        sum_x = block.T @ mask
+        sum_y = block_mask.T @ x
+        cov = block.T @ x - sum_x * sum_y / n
+        var_x = (block ** 2).T @ mask - sum_x ** 2 / n
+        var_y = block_mask.T @ (x ** 2) - sum_y ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+    return np.where(n >= 2, corr, np.nan)
+
+
+def correlation_summary(df: pd.DataFrame, target: str = None, top_k: int = 5,
+                        max_rows: int = 10_000, block_size: int = 256) -> dict:
+    # Sparse replacement for df.corr(): pairwise-complete Pearson r on a bounded row
+    # sample, computed in column blocks, keeping only the top_k strongest partners
+    # per column plus each column's correlation with the target.
+    numeric = df.select_dtypes(include=["number", "bool"])
+    if numeric.shape[1] < 2:
+        return {}
+    if len(numeric) > max_rows:
+        rows = np.sort(np.random.RandomState(42).choice(len(numeric), size=max_rows, replace=False))
+        numeric = numeric.iloc[rows]
+    columns = list(numeric.columns)
+    arr = numeric.to_numpy(dtype="float64", na_value=np.nan)
+    mask = (~np.isnan(arr)).astype("float64")
+    # Shifting by the column mean changes no r but keeps the sums below well conditioned.
+    with np.errstate(invalid="ignore"):
+        x = np.where(mask > 0, arr - np.nan_to_num(np.nanmean(arr, axis=0)), 0.0)
+    complete = bool(mask.all())
+
+    target_idx = columns.index(target) if target in columns else None
+    k = min(top_k, len(columns) - 1)
+    summary = {}
+    for start in range(0, len(columns), block_size):
+        stop = min(start + block_size, len(columns))
+        corr = np.clip(np.nan_to_num(_pairwise_corr(x, mask, start, stop, complete)), -1.0, 1.0)
+        for i in range(stop - start):
+            col_idx = start + i
+            strength = np.abs(corr[i])
+            strength[col_idx] = -1.0
+            keep = np.argpartition(-strength, k - 1)[:k] if k > 0 else []
+            keep = sorted(keep, key=lambda j: -strength[j])
+            if target_idx is not None and target_idx != col_idx and target_idx not in keep:
+                keep.append(target_idx)
+            summary[columns[col_idx]] = {columns[j]: round(float(corr[i, j]), 2) for j in keep}
+    return summary
+
+
+def gen_des(df: pd.DataFrame, sample_size=2, approximate: bool = False, error: float = 0.01,
+            target: str = None, corr_top_k: int = 5, corr_max_rows: int = 10_000) -> dict:
+    # approximate=True swaps exact nunique/value_counts/sample for sketches whose
+    # relative error is roughly `error`, keeping memory flat in the row count.
+    if approximate:
+        from .streaming import profile_stream
+        return profile_stream(df, sample_size=sample_size, error=error, target=target,
+                              corr_top_k=corr_top_k, corr_max_rows=corr_max_rows)
+
+    # Phase and per-column timings land in the active trace report, if any.
+    with timed("phases", "correlation"):
+        correlation = correlation_summary(df, target=target if has_target(target) else None, top_k=corr_top_k, max_rows=corr_max_rows)
     description = {
         "columns": {},
-        "correlation": df.corr(numeric_only=True).round(2).to_dict(),
+        "correlation": correlation,
         "num_rows": len(df),
         "num_columns": len(df.columns),
         "sample_rows": df.sample(min(sample_size, len(df)), random_state=42).to_dict(orient='records')
     }
 
+    with timed("phases", "dtypes"):
+        numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        categorical_cols = [col for col in df.columns if _is_categorical(df[col])]
+        other_cols = [col for col in df.columns if col not in set(categorical_cols)]
+
+    with timed("phases", "missing"):
+        missing_pct = (df.isna().mean() * 100).round(1)
+    with timed("phases", "numeric_stats"):
+        numeric_stats = _numeric_stats(df, numeric_cols)
+
+    with timed("phases", "unique"):
+        # Column by column: df[other_cols] would copy every non-categorical column first.
+        unique_count = {col: df[col].nunique() for col in other_cols}
+    with timed("phases", "examples"):
+        examples = _example_values(df)
+
+    # A single value_counts per categorical column yields both cardinality and top values.
+    distributions = {}
+    with timed("phases", "value_counts"):
+        for col in categorical_cols:
+            with timed("columns", col):
+                counts = df[col].value_counts()
+                # Unused categories of a category column are listed with a zero count.
+                unique_count[col] = int((counts > 0).sum())
+                distributions[col] = _distribution(list(counts.head(3).items()), counts.sum())
+
     for col in df.columns:
-        col_data = df[col]
         col_info = {
-            "dtype": str(col_data.dtype),
-            "missing_pct": round(col_data.isna().mean() * 100, 1),
-            "unique_count": col_data.nunique(),
-            "example_values": col_data.dropna().sample(
-                min(5, len(col_data.dropna())), 
-                random_state=42
-            ).tolist()
+            "dtype": str(df[col].dtype),
+            "missing_pct": float(missing_pct[col]),
+            "unique_count": int(unique_count[col]),
+            "example_values": examples[col]
         }
+        if col in numeric_stats:
+            col_info.update(numeric_stats[col])
+        if col in distributions:
+            col_info["value_distribution"] = distributions[col]
+        description["columns"][col] = col_info
 
-        # Numeric column features
-        if pd.api.types.is_numeric_dtype(col_data):
-            col_info.update({
-                "min": round(float(col_data.min()), 2) if not col_data.isna().all() else None,
-                "max": round(float(col_data.max()), 2) if not col_data.isna().all() else None,
-                "mean": round(float(col_data.mean()), 2) if not col_data.isna().all() else None,
-                "std": round(float(col_data.std()), 2) if not col_data.isna().all() else None,
-                "skew": round(float(col_data.skew()), 2) if len(col_data.dropna()) > 1 else None
-            })
-
-        # Categorical features
-        if pd.api.types.is_string_dtype(col_data) or pd.api.types.is_categorical_dtype(col_data):
-            freq = col_data.value_counts(normalize=True).head(3)
-            col_info["value_distribution"] = {
-                "top_values": freq.index.tolist(),
-                "percentages": [round(p*100, 1) for p in freq.values]
-            }
+    return description
 
-        description["columns"][col] = col_info
 
+def _describe(dataset, **kwargs) -> dict:
+    # In-memory frames are profiled directly; file paths and chunk iterators are streamed.
+    with span("profile", streamed=not isinstance(dataset, pd.DataFrame)) as attributes:
+        if isinstance(dataset, pd.DataFrame):
+            description = gen_des(dataset, **kwargs)
+        else:
+            from .streaming import profile_stream
+            description = profile_stream(dataset, **kwargs)
+        attributes["columns"] = description["num_columns"]
     return description
 
 
-def initialize_gemini(api_key: str):
- 
-    try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        # Test the model with a simple prompt to ensure the API key is valid.
-        test_response = model.generate_content("Test")
-        if not test_response.text:
-            raise Exception("No response")
+def describe_dataset(dataset, profile: dict = None, cache=PROFILE_CACHE, **kwargs) -> dict:
+    # A precomputed profile wins; otherwise profiles are memoized per dataset version.
+    # Only the correlation summary depends on the target, so it is cached per target.
+    if profile is not None:
+        return profile
+    fingerprint = dataset_fingerprint(dataset) if cache is not None else None
+    if fingerprint is None:
+        return _describe(dataset, **kwargs)
+
+    target = kwargs.pop("target", None)
+    target = target if has_target(target) else None
+    key = (fingerprint, tuple(sorted(kwargs.items())))
+
+    def compute():
+        description = _describe(dataset, target=target, **kwargs)
+        return {"description": description, "correlation": {target: description["correlation"]}}
+
+    # Pipelines started together on one frame wait for a single profiling pass.
+    entry, hit = cache.get_or_compute(key, compute)
+    if hit:
+        count("profile_cache_hits")
+    if target not in entry["correlation"]:
+        if isinstance(dataset, pd.DataFrame):
+            entry["correlation"][target] = correlation_summary(
+                dataset, target=target,
+                top_k=kwargs.get("corr_top_k", 5), max_rows=kwargs.get("corr_max_rows", 10_000)
+            )
+        else:
+            entry["correlation"][target] = _describe(dataset, target=target, **kwargs)["correlation"]
+    return dict(entry["description"], correlation=entry["correlation"][target])
+
+
+PROMPT_TOKENS = 2000
+HIGH_SKEW = 1.0
+HIGH_MISSING_PCT = 30.0
+STRONG_CORRELATION = 0.5
+
+
+def _estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text, numbers and column names.
+    return len(text) // 4 + 1
+
+
+def _clip(value, max_chars: int) -> str:
+    text = f"{value:.4g}" if isinstance(value, float) else str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 3] + "..."
+
+
+def _column_line(name, info: dict, max_chars: int) -> str:
+    fields = [str(name), info.get("dtype", ""), f"{info.get('missing_pct', 0):g}", str(info.get("unique_count", ""))]
+    if info.get("min") is not None:
+        fields += [f"{info['min']:g}..{info['max']:g}", f"{info['mean']:g}+-{info['std']:g}",
+                   "" if info.get("skew") is None else f"{info['skew']:g}"]
+    else:
+        fields += ["", "", ""]
+    distribution = info.get("value_distribution")
+    if distribution:
+        fields.append(", ".join(f"{_clip(v, max_chars)} {p:g}%" for v, p in
+                                zip(distribution["top_values"], distribution["percentages"])))
+    else:
+        fields.append(", ".join(_clip(v, max_chars) for v in info.get("example_values", [])[:3]))
+    return " | ".join(fields)
+
+
+def _flagged(info: dict) -> float:
+    # How much a column needs the model's attention: strong skew or many nulls.
+    skew = info.get("skew")
+    skew = abs(skew) if skew is not None and skew == skew and abs(skew) >= HIGH_SKEW else 0.0
+    missing = info.get("missing_pct", 0) / 10 if info.get("missing_pct", 0) >= HIGH_MISSING_PCT else 0.0
+    return max(skew, missing)
+
+
+def compact_description(description: dict, target: str = None, focus=(), max_tokens: int = PROMPT_TOKENS,
+                        max_value_chars: int = 24) -> str:
+    """Dense, token-budgeted text form of a gen_des profile for prompts.
+
+    The target and ``focus`` columns come first, then skewed and high-null columns,
+    then the rest in table order; whatever does not fit the budget is summarized.
+    """
+    columns = description.get("columns", {})
+    correlation = description.get("correlation", {})
+    pinned = [col for col in [target, *focus] if has_target(col) and col in columns]
+    flagged = sorted((col for col in columns if col not in pinned and _flagged(columns[col])),
+                     key=lambda col: -_flagged(columns[col]))
+    rest = [col for col in columns if col not in pinned and _flagged(columns[col]) == 0]
+
+    lines = [f"rows: {description.get('num_rows')}, columns: {description.get('num_columns')}"
+             + (f", target: {target}" if has_target(target) else "")]
+    budget = max_tokens - _estimate_tokens(lines[0])
+    header = "columns (name | dtype | missing% | unique | min..max | mean+-std | skew | top values or examples):"
+    lines.append(header)
+    budget -= _estimate_tokens(header)
+
+    if target in correlation:
+        partners = sorted(correlation[target].items(), key=lambda item: -abs(item[1]))
+        target_line = f"correlation with {target}: " + ", ".join(f"{col} {r:g}" for col, r in partners)
+        budget -= _estimate_tokens(target_line)
+    else:
+        target_line = None
+
+    # Strong pairs get up to a tenth of the budget so wide tables cannot crowd them out.
+    pairs = {}
+    for col, partners in correlation.items():
+        for other, r in partners.items():
+            if col != target and other != target and abs(r) >= STRONG_CORRELATION:
+                pairs.setdefault(tuple(sorted((str(col), str(other)))), r)
+    strong, pair_budget = [], max_tokens // 10
+    for (a, b), r in sorted(pairs.items(), key=lambda item: -abs(item[1])):
+        item = f"{a}~{b} {r:g}"
+        if _estimate_tokens(item) + 1 > pair_budget:
+            break
+        strong.append(item)
+        pair_budget -= _estimate_tokens(item) + 1
+        budget -= _estimate_tokens(item) + 1
+
+    shown, omitted = [], []
+    for col in pinned + flagged + rest:
+        line = _column_line(col, columns[col], max_value_chars)
+        cost = _estimate_tokens(line)
+        if omitted or cost > budget:
+            omitted.append(col)
+        else:
+            shown.append(line)
+            budget -= cost
+    lines.extend(shown)
+    if omitted:
+        names = ", ".join(map(str, omitted))
+        line = f"{len(omitted)} more columns: {names}"
+        if _estimate_tokens(line) > budget:
+            dtypes = {}
+            for col in omitted:
+                dtypes[columns[col].get("dtype")] = dtypes.get(columns[col].get("dtype"), 0) + 1
+            line = f"{len(omitted)} more columns not shown (" + ", ".join(f"{n} {d}" for d, n in dtypes.items()) + ")"
+        lines.append(line)
+        budget -= _estimate_tokens(line)
+    if target_line:
+        lines.append(target_line)
+
+    if strong:
+        lines.append("strongly correlated pairs: " + ", ".join(strong))
+
+    for row in description.get("sample_rows", [])[:1]:
+        line = "sample row: " + ", ".join(f"{k}={_clip(v, max_value_chars)}" for k, v in row.items())
+        if _estimate_tokens(line) <= budget:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def extract_code(text: str) -> str:
+    """Strip markdown fences and any prose before the first import."""
+    fenced = re.findall(r"```(?:python|py)?\s*\n(.*?)```", text, flags=re.DOTALL)
+    if fenced:
+        text = "\n".join(fenced)
+    if "import" in text and not text.lstrip().startswith(("import", "from", "#")):
+        text = text[text.index("import"):]
+    return text.strip() + "\n"
+
+
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def initialize_gemini(api_key: str, model_name: str = "gemini-1.5-flash", validate: bool = False):
+    # One model handle per (api_key, model_name) is shared by every pipeline in the process.
+    # The SDK is imported on first use and the key is only checked with a live call if asked.
+    key = (api_key, model_name)
+    with _MODELS_LOCK:
+        if key in _MODELS:
+            return _MODELS[key]
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(model_name)
+            if validate:
+                # Test the model with a simple prompt to ensure the API key is valid.
+                test_response = model.generate_content("Test")
+                if not test_response.text:
+                    raise Exception("No response")
+        except Exception as e:
+            print("API not valid")
+            return None
+        _MODELS[key] = model
+        return model
+
+def load_model(model, api_key: str = None, strategy_engine: str = "llm"):
+    # The local strategy engine runs fully offline unless a model or key is given.
+    if model is not None:
         return model
-    except Exception as e:
-        print("API not valid")
-        return None
\ No newline at end of file
+    if strategy_engine == "local" and api_key is None:
+        return None
+    return initialize_gemini(api_key)
+
+
+def prepare_model(model, cache=None, scheduler=None, priority: int = 0):
+    # Layer wrappers over the raw Gemini model; callers keep using generate_content.
+    # Calls go through the shared SCHEDULER unless another one (or False) is given, and
+    # the cache sits outside it so cache hits never spend quota.
+    if model is None:
+        return None
+    if scheduler is not False:
+        model = ScheduledModel(model, scheduler if scheduler is not None else SCHEDULER, priority)
+    if cache is not None:
+        model = CachedModel(model, cache)
+    return TracedModel(model)
+
@@ -0,0 +1,177 @@
+import inspect
+
+import numpy as np
+import pandas as pd
+
+# Dtype plans that shrink a frame without changing its values: integers (and floats
+# holding whole numbers) go to the narrowest signed integer type, floats to float32
+# when that is exact, and repetitive strings to category. The plan is also emitted as
+# code for replays, where each narrowing is re-checked against the batch at hand and
+# the column is left alone when its values no longer fit.
+
+CATEGORY_RATIO = 0.5
+BACKENDS = (None, "numpy_nullable", "pyarrow")
+_INT_BITS = (8, 16, 32, 64)
+
+
+def check_backend(dtype_backend: str) -> str:
+    if dtype_backend not in BACKENDS:
+        raise ValueError(f"dtype_backend must be one of {BACKENDS}, got {dtype_backend!r}")
+    if dtype_backend == "pyarrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("dtype_backend='pyarrow' requires 'pyarrow'") from e
+    return dtype_backend
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _int_dtype(low, high, dtype_backend: str, nullable: bool):
+    bits = next((b for b in _INT_BITS if np.iinfo(f"int{b}").min <= low and high <= np.iinfo(f"int{b}").max), None)
+    if bits is None:
+        # e.g. uint64 values above the int64 range.
+        return None
+    if dtype_backend == "pyarrow":
+        return f"int{bits}[pyarrow]"
+    if dtype_backend == "numpy_nullable" or nullable:
+        return f"Int{bits}"
+    return f"int{bits}"
+
+
+def _float32(values: np.ndarray, dtype_backend: str, allow_float32: bool):
+    # NaN-aware comparison by hand: array_equal(equal_nan=True) needs numpy>=1.19.
+    roundtrip = values.astype("float32").astype("float64")
+    if not allow_float32 and not ((roundtrip == values) | (np.isnan(roundtrip) & np.isnan(values))).all():
+        return None
+    return {"pyarrow": "float[pyarrow]", "numpy_nullable": "Float32"}.get(dtype_backend, "float32")
+
+
+def _numeric_dtype(series: pd.Series, dtype_backend: str, allow_float32: bool):
+    if series.dtype.kind in "iu":
+        if not len(series):
+            return None
+        dtype = _int_dtype(int(series.min()), int(series.max()), dtype_backend, False)
+        return dtype if dtype != str(series.dtype) else None
+    values = series.to_numpy()
+    observed = values[~np.isnan(values)]
+    if not len(observed) or not np.isfinite(observed).all():
+        return None
+    low, high = observed.min(), observed.max()
+    whole = low >= np.iinfo("int64").min and high <= np.iinfo("int64").max and (observed == np.round(observed)).all()
+    if whole:
+        # Nullable even without gaps here, so a later batch with NaN still fits.
+        return _int_dtype(int(low), int(high), dtype_backend, True)
+    return _float32(values, dtype_backend, allow_float32) if series.dtype == "float64" else None
+
+
+def _string_dtype(series: pd.Series, dtype_backend: str, category_ratio: float):
+    if pd.api.types.infer_dtype(series, skipna=True) != "string":
+        return None
+    observed = series.count()
+    if observed and series.nunique() <= category_ratio * observed:
+        return "category"
+    return "string[pyarrow]" if dtype_backend == "pyarrow" else None
+
+
+def dtype_plan(df: pd.DataFrame, exclude=(), dtype_backend: str = None, category_ratio: float = CATEGORY_RATIO,
+               allow_float32: bool = False) -> dict:
+    """Smaller dtypes for the columns of ``df`` that can hold the same values; ``{column: dtype}``.
+
+    ``allow_float32`` also narrows floats that are not exactly representable (~7 digits).
+    Note that arithmetic on narrow integer columns can overflow.
+    """
+    check_backend(dtype_backend)
+    plan = {}
+    for col in df.columns:
+        if col in exclude:
+            continue
+        series = df[col]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+            dtype = _numeric_dtype(series, dtype_backend, allow_float32)
+        elif series.dtype == object or (pd.api.types.is_string_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype)):
+            dtype = _string_dtype(series, dtype_backend, category_ratio)
+        else:
+            dtype = None
+        if dtype is not None and dtype != str(series.dtype):
+            plan[col] = dtype
+    return plan
+
+
+def narrow_column(series, dtype, allow_float32=False):
+    # Cast only when this batch's values survive unchanged; otherwise keep the column as is.
+    import numpy as np
+    import pandas as pd
+    target = pd.api.types.pandas_dtype(dtype)
+    if isinstance(target, pd.CategoricalDtype) or pd.api.types.is_string_dtype(target):
+        return series.astype(target)
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    kind = np.dtype(getattr(target, "numpy_dtype", target))
+    if pd.api.types.is_integer_dtype(series):
+        observed = series.dropna()
+        whole = True
+    else:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        observed = values[~np.isnan(values)]
+        if not np.isfinite(observed).all():
+            return series
+        if kind.kind == "f":
+            if len(observed) and np.abs(observed).max() > np.finfo(kind).max:
+                return series
+            narrowed = series.astype(target)
+            roundtrip = narrowed.to_numpy(dtype="float64", na_value=np.nan)
+            exact = ((roundtrip == values) | (np.isnan(roundtrip) & np.isnan(values))).all()
+            return narrowed if exact or allow_float32 else series
+        whole = (observed == np.round(observed)).all()
+        if kind.kind in "iu" and isinstance(target, np.dtype):
+            # Float columns may gain NaN in a later batch, so they only go to nullable integers.
+            target = pd.api.types.pandas_dtype(f"Int{kind.itemsize * 8}")
+    if kind.kind not in "iu" or not whole:
+        return series
+    if len(observed) and not (np.iinfo(kind).min <= observed.min() and observed.max() <= np.iinfo(kind).max):
+        return series
+    return series.astype(target)
+
+
+def dtype_code(plan: dict, allow_float32: bool = False) -> str:
+    if not plan:
+        return ""
+    return "\n".join([
+        "import numpy as np",
+        "import pandas as pd",
+        "",
+        "",
+        inspect.getsource(narrow_column),
+        "# Memory optimization: narrower numeric dtypes and categorical strings, where the values fit",
+        f"for col, dtype in {plan!r}.items():",
+        "    if col in df.columns:",
+        f"        df[col] = narrow_column(df[col], dtype, {allow_float32!r})",
+        "",
+        "",
+    ])
+
+
+def optimize_dtypes(df: pd.DataFrame, exclude=(), dtype_backend: str = None, category_ratio: float = CATEGORY_RATIO,
+                    allow_float32: bool = False):
+    """Return ``(optimized frame, report)``; the report has deep memory usage before and after."""
+    plan = dtype_plan(df, exclude, dtype_backend, category_ratio, allow_float32)
+    before = memory_usage(df)
+    optimized = df.astype(plan) if plan else df
+    after = memory_usage(optimized) if plan else before
+    return optimized, {
+        "before": before,
+        "after": after,
+        "saved_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+        "dtypes": plan,
+        "code": dtype_code(plan, allow_float32),
+    }
+
+
+def with_dtypes(description: dict, plan: dict) -> dict:
+    # The values are unchanged, so a profile only needs its dtype strings updated.
+    columns = {col: dict(info, dtype=str(pd.api.types.pandas_dtype(plan[col]))) if col in plan else info
+               for col, info in description["columns"].items()}
+    return dict(description, columns=columns)
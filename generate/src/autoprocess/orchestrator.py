@@ -0,0 +1,132 @@
+import inspect
+import json
+from typing import NamedTuple
+
+import pandas as pd
+
+from .cache import ProfileCache, dataset_fingerprint
+from .cleaning import DataCleaningPipeline
+from .feature_eng import FeatureEngineeringPipeline
+from .helper import describe_dataset, run_blocking
+from .tracing import span, traced
+from .transforming import DataTransformationPipeline
+from .unskew import SkewCorrectionPipeline, skewed_columns
+
+# Runs clean -> transform -> unskew -> features, applying each stage's code to produce
+# the next stage's input. Every stage is cached on (input fingerprint, target, options),
+# so changing one stage's options only re-runs that stage and the ones after it. The cache
+# keeps each stage's code, fitted transformer and output profile, not the output frame:
+# a hit replays the transformer on its input instead.
+
+STAGES = ("clean", "transform", "unskew", "features")
+
+
+class StageResult(NamedTuple):
+    code: str
+    transformer: object
+    output: pd.DataFrame
+    description: dict
+    cached: bool
+
+
+class PipelineOrchestrator:
+    """End-to-end preprocessing over the four pipelines.
+
+    Stage options are passed to ``run`` as dicts of keyword arguments for the stage's
+    pipeline method (``clean=dict(outlier=False)``), or ``False`` to skip the stage.
+    Remaining keyword arguments are pipeline constructor options; each goes to the
+    pipelines that accept it (``strategy_engine`` to all four, ``optimize_memory`` only
+    to the cleaning pipeline).
+    """
+
+    def __init__(self, api_key: str = None, cache=None, model=None, stage_cache=None, **pipeline_options):
+        classes = {
+            "clean": DataCleaningPipeline,
+            "transform": DataTransformationPipeline,
+            "unskew": SkewCorrectionPipeline,
+            "features": FeatureEngineeringPipeline,
+        }
+        accepted = {stage: set(inspect.signature(cls).parameters) for stage, cls in classes.items()}
+        unknown = sorted(set(pipeline_options) - set().union(*accepted.values()))
+        if unknown:
+            raise TypeError(f"PipelineOrchestrator got unexpected keyword arguments {unknown}")
+        self.pipelines = {
+            stage: cls(api_key, cache=cache, model=model,
+                       **{key: value for key, value in pipeline_options.items() if key in accepted[stage]})
+            for stage, cls in classes.items()
+        }
+        self.stage_cache = stage_cache if stage_cache is not None else ProfileCache(max_entries=16)
+        self.tracer = pipeline_options.get("tracer")
+        self.stages_ = {}
+
+    @traced("run")
+    def run(self, dataset: pd.DataFrame, target: str = "", clean=None, transform=None, unskew=None, features=None) -> dict:
+        options = {"clean": clean, "transform": transform, "unskew": unskew, "features": features}
+        data = dataset
+        description = describe_dataset(data, target=target)
+        self.stages_ = {}
+        for stage in STAGES:
+            if options[stage] is False:
+                continue
+            with span(f"stage:{stage}") as attributes:
+                result = self._run_stage(stage, data, description, target, dict(options[stage] or {}))
+                attributes["cached"] = result.cached
+            self.stages_[stage] = result
+            data, description = result.output, result.description
+        return {
+            "data": data,
+            "code": {stage: result.code for stage, result in self.stages_.items()},
+            "cached": [stage for stage, result in self.stages_.items() if result.cached],
+        }
+
+    async def arun(self, dataset: pd.DataFrame, target: str = "", clean=None, transform=None, unskew=None, features=None) -> dict:
+        return await run_blocking(self.run, dataset, target, clean, transform, unskew, features)
+
+    def transform(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """Replay the fitted stages of the last ``run`` on new data."""
+        if not self.stages_:
+            raise ValueError("PipelineOrchestrator has not been run yet; call run() first")
+        for result in self.stages_.values():
+            if result.transformer is not None:
+                dataset = result.transformer.transform(dataset)
+        return dataset
+
+    def _run_stage(self, stage: str, data: pd.DataFrame, description: dict, target: str, options: dict) -> StageResult:
+        fingerprint = dataset_fingerprint(data)
+        key = None
+        if fingerprint is not None:
+            key = (stage, fingerprint, target, json.dumps(options, sort_keys=True, default=str))
+            hit = self.stage_cache.get(key)
+            if hit is not None:
+                output = hit.transformer.transform(data) if hit.transformer is not None else data
+                return hit._replace(output=output, cached=True)
+
+        code = self._generate(stage, data, description, target, options)
+        if not code:
+            # e.g. no column is skewed enough to correct.
+            result = StageResult(code, None, data, description, False)
+        else:
+            from .compiled import GeneratedTransformer
+            transformer = GeneratedTransformer(code)
+            output = transformer.fit_transform(data)
+            result = StageResult(code, transformer, output, describe_dataset(output, target=target), False)
+        if key is not None:
+            self.stage_cache.set(key, result._replace(output=None))
+        return result
+
+    def _generate(self, stage: str, data: pd.DataFrame, description: dict, target: str, options: dict) -> str:
+        pipeline = self.pipelines[stage]
+        if stage == "clean":
+            result = pipeline.data_clean(data, target=target, profile=description, **options)
+        elif stage == "transform":
+            result = pipeline.generate_transformation_code(data, target=target, profile=description, **options)
+        elif stage == "unskew":
+            if "columns" not in options:
+                threshold = options.pop("skew_threshold", 1.0)
+                options["columns"] = [col for col in skewed_columns(description, threshold) if col != target]
+            return pipeline.generate_batch_skew_correction(data, profile=description, **options)
+        else:
+            result = pipeline.generate_features(data, target, profile=description, **options)
+        if "error" in result:
+            raise ValueError(f"The {stage} stage failed: {result['error']}")
+        return result["code"]
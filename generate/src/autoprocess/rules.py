@@ -0,0 +1,306 @@
+import json
+import re
+from typing import List, NamedTuple
+
+from .helper import STRONG_CORRELATION, has_target
+
+# Deterministic strategy engine: decides the mechanical cases straight from the gen_des
+# profile, emits the same JSON strategy schemas the prompts ask for plus code that
+# implements them, and lists the columns it considers ambiguous for the LLM.
+
+MISSING_AMBIGUOUS_PCT = 30.0
+MISSING_DROP_PCT = 60.0
+ONE_HOT_MAX_UNIQUE = 10
+ORDINAL_MAX_UNIQUE = 50
+HIGH_SKEW = 1.0
+LOG_SKEW = 2.0
+ENGINES = ("llm", "local", "hybrid")
+
+
+class LocalPlan(NamedTuple):
+    strategy: dict
+    code: str
+    ambiguous: List[str]
+
+
+def check_engine(engine: str) -> str:
+    if engine not in ENGINES:
+        raise ValueError(f"strategy_engine must be one of {ENGINES}, got {engine!r}")
+    return engine
+
+
+def resolves_locally(engine: str, plan: LocalPlan) -> bool:
+    # "local" never calls the model; "hybrid" only escalates when some columns are ambiguous.
+    return plan is not None and (engine == "local" or not plan.ambiguous)
+
+
+def escalation_prompt(plan: LocalPlan) -> str:
+    return "\n".join([
+        f"Already decided by local rules (keep these decisions unchanged): {json.dumps(plan.strategy, default=str)}",
+        f"Only decide for these columns: {plan.ambiguous}"
+    ])
+
+
+def with_local_strategy(plan: LocalPlan, strategy_text: str) -> str:
+    if plan is None:
+        return strategy_text
+    return "\n".join([f"Local rules strategy: {json.dumps(plan.strategy, default=str)}", f"Model strategy: {strategy_text}"])
+
+
+def _is_numeric(info: dict) -> bool:
+    return "mean" in info and info["dtype"] != "bool"
+
+
+def _is_categorical(info: dict) -> bool:
+    return "value_distribution" in info or info["dtype"] in ("object", "str", "string", "category")
+
+
+def _is_integer(info: dict) -> bool:
+    return re.match(r"u?int", info["dtype"], re.IGNORECASE) is not None
+
+
+def _is_datetime(info: dict) -> bool:
+    return info["dtype"].startswith("datetime")
+
+
+def _looks_numeric(info: dict) -> bool:
+    values = info.get("example_values") or []
+    if not values or not _is_categorical(info):
+        return False
+    try:
+        [float(v) for v in values]
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _abs_skew(info: dict) -> float:
+    skew = info.get("skew")
+    return abs(skew) if skew is not None and skew == skew else 0.0
+
+
+def cleaning_plan(description: dict, target: str = "", outlier=True, missing=True, duplicate=True,
+                  in_place: bool = False) -> LocalPlan:
+    # in_place=True overwrites the original columns instead of adding '_cleaned' copies.
+    columns = description["columns"]
+    suffix = "" if in_place else "_cleaned"
+    impute, drop_columns, ambiguous, winsorize = {}, [], [], []
+    drop_rows = [target] if has_target(target) and columns.get(target, {}).get("missing_pct") else []
+
+    if missing:
+        for col, info in columns.items():
+            pct = info["missing_pct"]
+            if col == target or not pct:
+                continue
+            if pct >= MISSING_DROP_PCT:
+                drop_columns.append(col)
+            elif pct >= MISSING_AMBIGUOUS_PCT:
+                ambiguous.append(col)
+            elif _is_numeric(info):
+                impute[col] = "median" if _abs_skew(info) >= HIGH_SKEW else "mean"
+            elif _is_categorical(info) or info["dtype"] == "bool":
+                impute[col] = "mode"
+            else:
+                ambiguous.append(col)
+
+    if outlier:
+        winsorize = [
+            col for col, info in columns.items()
+            if col != target and col not in drop_columns and _is_numeric(info) and info["unique_count"] > ONE_HOT_MAX_UNIQUE
+        ]
+
+    strategy = {}
+    if missing:
+        strategy["missing_values"] = {
+            "method": "impute",
+            "parameters": {"impute": impute, "drop_columns": drop_columns, "drop_rows_missing": drop_rows},
+            "reason": f"Impute columns under {MISSING_AMBIGUOUS_PCT:g}% missing (median if |skew| >= {HIGH_SKEW:g}, "
+                      f"else mean; mode for categoricals); drop columns at or above {MISSING_DROP_PCT:g}% missing."
+        }
+    if outlier:
+        strategy["outlier_handling"] = {
+            "method": "winsorization",
+            "parameters": {"columns": winsorize, "iqr_factor": 1.5},
+            "reason": "Clip continuous numeric columns to the 1.5 * IQR fences, keeping every row."
+        }
+    if duplicate:
+        strategy["duplicate_handling"] = {
+            "action": "drop", "parameters": {"keep": "first"}, "reason": "Exact duplicate rows carry no information."
+        }
+    strategy["recommendations"] = [f"Review {col}: {columns[col]['missing_pct']}% missing" for col in ambiguous]
+
+    lines = ["import numpy as np", "import pandas as pd", ""]
+    if duplicate:
+        lines += ["# Remove exact duplicate rows", "df = df.drop_duplicates(keep='first').reset_index(drop=True)"]
+    if drop_columns:
+        lines += ["# Drop columns that are mostly missing", f"df = df.drop(columns={drop_columns!r})"]
+    if drop_rows:
+        lines += ["# Drop rows where the target is missing", f"df = df.dropna(subset={drop_rows!r}).reset_index(drop=True)"]
+    if impute:
+        lines.append("# Impute missing values in place" if in_place else "# Impute missing values into '_cleaned' columns")
+        for col, how in impute.items():
+            fill = f"df[{col!r}].mode().iloc[0]" if how == "mode" else f"df[{col!r}].{how}()"
+            if how != "mode" and _is_integer(columns[col]):
+                # Nullable integer columns only accept whole fill values.
+                fill = f"round({fill})"
+            lines.append(f"df[{(str(col) + suffix)!r}] = df[{col!r}].fillna({fill})")
+    if winsorize:
+        out = f"col + {suffix!r}" if suffix else "col"
+        lines += [
+            "# Winsorize outliers to the IQR fences",
+            f"for col in {winsorize!r}:",
+            f"    source = {out} if {out} in df.columns else col" if suffix else "    source = col",
+            "    q1, q3 = df[source].quantile(0.25), df[source].quantile(0.75)",
+            "    iqr = q3 - q1",
+            "    lower, upper = q1 - 1.5 * iqr, q3 + 1.5 * iqr",
+            "    if pd.api.types.is_integer_dtype(df[source]):",
+            "        lower, upper = int(np.floor(lower)), int(np.ceil(upper))",
+            f"    df[{out}] = df[source].clip(lower, upper)",
+        ]
+    return LocalPlan(strategy, "\n".join(lines) + "\n", ambiguous)
+
+
+def transformation_plan(description: dict, target: str = "", skip_encoding: list = None,
+                        skip_normalisation: list = None) -> LocalPlan:
+    skip_encoding = set(skip_encoding or [])
+    skip_normalisation = set(skip_normalisation or [])
+    datatypes, encoding, scaling, ambiguous = {}, {}, {}, []
+
+    for col, info in description["columns"].items():
+        if col == target:
+            continue
+        if _looks_numeric(info):
+            datatypes[col] = {"action": "to_numeric", "reason": "Example values are all numeric strings."}
+        elif _is_categorical(info) and col not in skip_encoding:
+            unique = info["unique_count"]
+            if unique <= 1:
+                continue
+            if unique <= ONE_HOT_MAX_UNIQUE:
+                encoding[col] = {"action": "one_hot", "reason": f"Low cardinality ({unique} values)."}
+            elif unique <= ORDINAL_MAX_UNIQUE:
+                encoding[col] = {"action": "ordinal", "reason": f"Moderate cardinality ({unique} values)."}
+            else:
+                ambiguous.append(col)
+        elif _is_numeric(info) and col not in skip_normalisation and info["unique_count"] > 2:
+            if _abs_skew(info) >= HIGH_SKEW:
+                scaling[col] = {"action": "robust_scaler", "reason": f"Skewed (|skew| >= {HIGH_SKEW:g}); robust to outliers."}
+            else:
+                scaling[col] = {"action": "standard_scaler", "reason": "Roughly symmetric numeric column."}
+
+    strategy = {"datatype_handling": datatypes, "categorical_encoding": encoding, "scaling_normalisation": scaling}
+    one_hot = [c for c, v in encoding.items() if v["action"] == "one_hot"]
+    ordinal = [c for c, v in encoding.items() if v["action"] == "ordinal"]
+    standard = [c for c, v in scaling.items() if v["action"] == "standard_scaler"]
+    robust = [c for c, v in scaling.items() if v["action"] == "robust_scaler"]
+
+    lines = ["import pandas as pd", "from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, RobustScaler, StandardScaler", ""]
+    if datatypes:
+        lines.append("# Datatype conversions")
+        for col in datatypes:
+            lines.append(f"df[{(str(col) + '_transformed')!r}] = pd.to_numeric(df[{col!r}], errors='coerce')")
+    if one_hot:
+        lines += [
+            "# One-hot encode low-cardinality categoricals",
+            f"for col in {one_hot!r}:",
+            "    encoder = OneHotEncoder(handle_unknown='ignore')",
+            "    encoded = encoder.fit_transform(df[[col]].astype(str)).toarray()",
+            "    names = [f'{col}_{value}_transformed' for value in encoder.categories_[0]]",
+            "    df = pd.concat([df, pd.DataFrame(encoded, columns=names, index=df.index)], axis=1)",
+        ]
+    if ordinal:
+        lines += [
+            "# Ordinal encode moderate-cardinality categoricals",
+            "ordinal_encoder = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1)",
+            f"encoded = ordinal_encoder.fit_transform(df[{ordinal!r}].astype(str))",
+            f"df = pd.concat([df, pd.DataFrame(encoded, columns={[str(c) + '_transformed' for c in ordinal]!r}, index=df.index)], axis=1)",
+        ]
+    for name, cols in (("StandardScaler", standard), ("RobustScaler", robust)):
+        if cols:
+            lines += [
+                f"# Scale numeric columns with {name}",
+                f"scaled = {name}().fit_transform(df[{cols!r}])",
+                f"df = pd.concat([df, pd.DataFrame(scaled, columns={[str(c) + '_transformed' for c in cols]!r}, index=df.index)], axis=1)",
+            ]
+    return LocalPlan(strategy, "\n".join(lines) + "\n", ambiguous)
+
+
+def skew_plan(description: dict, column_name) -> LocalPlan:
+    batch = isinstance(column_name, list)
+    columns = column_name if batch else [column_name]
+    methods, ambiguous = {}, []
+    for col in columns:
+        info = description["columns"].get(col, {})
+        skew, low = info.get("skew"), info.get("min")
+        if skew is None or skew != skew or low is None:
+            ambiguous.append(col)
+        elif low >= 0 and skew >= LOG_SKEW:
+            methods[col] = {"method": "log_transform", "reason": f"Non-negative with strong right skew ({skew}); log1p."}
+        elif low > 0:
+            methods[col] = {"method": "box_cox", "reason": "Strictly positive; Box-Cox fits the power parameter."}
+        else:
+            methods[col] = {"method": "yeo_johnson", "reason": "Contains zeros or negatives; Yeo-Johnson handles any sign."}
+
+    strategy = methods if batch else methods.get(column_name, {})
+    lines = ["import numpy as np", "from sklearn.preprocessing import PowerTransformer", ""]
+    log_cols = [c for c, v in methods.items() if v["method"] == "log_transform"]
+    if log_cols:
+        lines.append("# log1p transform for non-negative, strongly right-skewed columns")
+        for col in log_cols:
+            lines.append(f"df[{(str(col) + '_unskewed')!r}] = np.log1p(df[{col!r}])")
+    for method, power in (("box_cox", "box-cox"), ("yeo_johnson", "yeo-johnson")):
+        cols = [c for c, v in methods.items() if v["method"] == method]
+        if cols:
+            lines += [
+                f"# {method} power transform, fitted once for the group",
+                f"transformer = PowerTransformer(method={power!r})",
+                f"df[{[str(c) + '_unskewed' for c in cols]!r}] = transformer.fit_transform(df[{cols!r}])",
+            ]
+    return LocalPlan(strategy, "\n".join(lines) + "\n", ambiguous)
+
+
+def feature_plan(description: dict, target: str, drop_columns: bool = True, max_interactions: int = 3) -> LocalPlan:
+    columns = description["columns"]
+    num_rows = description.get("num_rows") or 0
+    to_drop, datetimes = [], []
+
+    for col, info in columns.items():
+        if col == target:
+            continue
+        id_like = bool(re.search(r"(^|_)id$", str(col).lower())) or _is_categorical(info)
+        if drop_columns and (info["unique_count"] <= 1 or info["missing_pct"] >= 95
+                             or (id_like and num_rows and info["unique_count"] >= 0.95 * num_rows)):
+            to_drop.append(col)
+        elif _is_datetime(info):
+            datetimes.append(col)
+
+    target_corr = {
+        col: abs(partners[target]) for col, partners in description.get("correlation", {}).items()
+        if col != target and col not in to_drop and target in partners and _is_numeric(columns.get(col, {"dtype": ""}))
+        and abs(partners[target]) >= STRONG_CORRELATION
+    }
+    top = sorted(target_corr, key=target_corr.get, reverse=True)[:max_interactions]
+    pairs = [[a, b] for i, a in enumerate(top) for b in top[i + 1:]]
+
+    creation = []
+    if datetimes:
+        creation.append({"method": "datetime_parts", "columns": datetimes, "reason": "Expose calendar structure."})
+    for pair in pairs:
+        creation.append({"method": "interaction", "columns": pair, "reason": f"Both columns have |r| >= {STRONG_CORRELATION:g} with the target."})
+    strategy = {"feature_creation": creation, "feature_transformation": [], "columns_to_drop": to_drop}
+    # Domain-specific features always need the model; everything not dropped is open.
+    ambiguous = [col for col in columns if col != target and col not in to_drop]
+
+    lines = ["import pandas as pd", ""]
+    if datetimes:
+        lines.append("# Calendar features from datetime columns")
+        for col in datetimes:
+            lines.append(f"parsed = pd.to_datetime(df[{col!r}], errors='coerce')")
+            for part in ("year", "month", "day", "dayofweek"):
+                lines.append(f"df[{(str(col) + '_' + part + '_engineered')!r}] = parsed.dt.{part}")
+    if pairs:
+        lines.append("# Pairwise interactions between the most target-correlated columns")
+        for a, b in pairs:
+            lines.append(f"df[{(str(a) + '_x_' + str(b) + '_engineered')!r}] = df[{a!r}] * df[{b!r}]")
+    if to_drop:
+        lines += ["# Drop constant, mostly-missing and identifier columns", f"df = df.drop(columns={to_drop!r})"]
+    return LocalPlan(strategy, "\n".join(lines) + "\n", ambiguous)
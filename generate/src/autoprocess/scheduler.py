@@ -0,0 +1,246 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from .chain import agenerate_content
+from .tracing import count
+
+# All model calls can be routed through one RequestScheduler so bulk runs share the API
+# quota: token buckets pace requests and tokens per minute, a priority-ordered gate
+# bounds how many calls are in flight, and quota errors or empty responses are retried
+# with jittered exponential backoff instead of failing the whole batch.
+
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "RateLimitError", "APITimeoutError",
+}
+RETRYABLE_MESSAGES = ("429", "503", "quota", "rate limit", "resource exhausted", "temporarily unavailable", "overloaded")
+
+
+def _prompt_tokens(prompt) -> int:
+    text = prompt if isinstance(prompt, str) else "\n".join(map(str, prompt))
+    return len(text) // 4 + 1
+
+
+def _response_text(response) -> str:
+    try:
+        return response.text or ""
+    except ValueError:
+        # Blocked or empty candidates.
+        return ""
+
+
+def _used_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", None)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERRORS or getattr(error, "code", None) in (429, 500, 503):
+        return True
+    message = str(error).lower()
+    return any(fragment in message for fragment in RETRYABLE_MESSAGES)
+
+
+class TokenBucket:
+    """Refills at ``per_minute / 60`` units per second up to ``capacity``.
+
+    ``reserve`` always succeeds and returns how long the caller must wait; going into
+    debt keeps the queue fair for requests larger than the bucket.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def drain(self):
+        # The API said the quota is exhausted; stop handing out credit until it refills.
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class _Waiter:
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+class RequestScheduler:
+    def __init__(self, requests_per_minute: float = None, tokens_per_minute: float = None, max_concurrency: int = 16,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self._active = 0
+        self._waiters = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    # -- priority-ordered concurrency gate (lower priority value is served first) --
+
+    def _try_enter(self, priority: int, wake):
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                return None
+            waiter = _Waiter(wake)
+            heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+            return waiter
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+            while self._waiters and self._active < self.max_concurrency:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if not waiter.cancelled:
+                    self._active += 1
+                    waiter.granted = True
+                    waiter.wake()
+
+    def _enter(self, priority: int):
+        event = threading.Event()
+        if self._try_enter(priority, event.set) is not None:
+            event.wait()
+
+    async def _aenter(self, priority: int):
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = self._try_enter(priority, wake)
+        if waiter is None:
+            return
+        try:
+            await granted
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                release = waiter.granted
+            if release:
+                self._release()
+            raise
+
+    # -- pacing and retries --
+
+    def _delay(self, prompt) -> float:
+        delay = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(_prompt_tokens(prompt)))
+        return delay
+
+    def _settle(self, prompt, response):
+        used = _used_tokens(response)
+        if self.tokens and used:
+            # Charge the part of the real usage that the prompt estimate did not cover.
+            self.tokens.reserve(max(0, used - _prompt_tokens(prompt)))
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _failed(self, error: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries or not is_retryable(error):
+            return False
+        if self.requests:
+            self.requests.drain()
+        self.retries += 1
+        count("retries")
+        return True
+
+    def call(self, model, prompt, priority: int = 0, **kwargs):
+        attempt = 0
+        while True:
+            self._enter(priority)
+            try:
+                time.sleep(self._delay(prompt))
+                response = model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                response = None
+            finally:
+                self._release()
+            if response is not None:
+                self._settle(prompt, response)
+                if _response_text(response) or attempt >= self.max_retries:
+                    return response
+                self.retries += 1
+                count("retries")
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def acall(self, model, prompt, priority: int = 0, **kwargs):
+        attempt = 0
+        while True:
+            await self._aenter(priority)
+            try:
+                await asyncio.sleep(self._delay(prompt))
+                response = await agenerate_content(model, prompt, **kwargs)
+            except Exception as e:
+                if not self._failed(e, attempt):
+                    raise
+                response = None
+            finally:
+                self._release()
+            if response is not None:
+                self._settle(prompt, response)
+                if _response_text(response) or attempt >= self.max_retries:
+                    return response
+                self.retries += 1
+                count("retries")
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"active": self._active, "waiting": sum(not w.cancelled for _, _, w in self._waiters),
+                    "retries": self.retries}
+
+
+class ScheduledModel:
+    """Routes a model's calls through a RequestScheduler at a fixed priority."""
+
+    def __init__(self, model, scheduler: RequestScheduler, priority: int = 0):
+        self.model = model
+        self.scheduler = scheduler
+        self.priority = priority
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+
+    def generate_content(self, prompt, **kwargs):
+        return self.scheduler.call(self.model, prompt, self.priority, **kwargs)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self.scheduler.acall(self.model, prompt, self.priority, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+SCHEDULER = RequestScheduler()
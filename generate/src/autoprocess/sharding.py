@@ -0,0 +1,140 @@
+import json
+from typing import List
+
+from .helper import STRONG_CORRELATION, extract_code, has_target
+
+# Very wide tables are split into column shards that are planned and coded concurrently,
+# then reduced to one strategy and one code block. Strongly correlated columns share a
+# shard so decisions about redundant features are made together, and every shard sees
+# the target with its correlations.
+
+
+def column_shards(description: dict, shard_size: int, target: str = None) -> List[List[str]]:
+    correlation = description.get("correlation", {})
+    columns = [col for col in description["columns"] if col != target]
+    assigned, groups = set(), []
+    for col in columns:
+        if col in assigned:
+            continue
+        group = [col]
+        for other, r in sorted(correlation.get(col, {}).items(), key=lambda item: -abs(item[1])):
+            if len(group) >= shard_size:
+                break
+            if other != target and other not in assigned and other in description["columns"] and abs(r) >= STRONG_CORRELATION:
+                group.append(other)
+        assigned.update(group)
+        groups.append(group)
+
+    shards = []
+    for group in groups:
+        if shards and len(shards[-1]) + len(group) <= shard_size:
+            shards[-1].extend(group)
+        else:
+            shards.append(list(group))
+    return shards
+
+
+def shard_description(description: dict, columns: List[str], target: str = None) -> dict:
+    keep = list(columns) + ([target] if target in description["columns"] else [])
+    wanted = set(keep)
+    return {
+        "columns": {col: description["columns"][col] for col in keep},
+        "correlation": {
+            col: {other: r for other, r in partners.items() if other in wanted}
+            for col, partners in description.get("correlation", {}).items() if col in wanted
+        },
+        "num_rows": description.get("num_rows"),
+        "num_columns": len(keep),
+        "sample_rows": [{col: row[col] for col in keep if col in row} for row in description.get("sample_rows", [])],
+    }
+
+
+def shard_context(index: int, count: int, columns: List[str], target: str = None) -> str:
+    return "\n".join([
+        f"This request covers shard {index + 1} of {count} of a wide dataset; other shards handle the remaining columns.",
+        f"Only plan and write code for these columns: {columns}.",
+        f"Do not modify or drop the target column '{target}'." if has_target(target) else "",
+    ])
+
+
+def parse_strategy(text: str):
+    # Strategy text may wrap the JSON in prose or fences, or hold a local and a model strategy.
+    decoder, found, position = json.JSONDecoder(), {}, 0
+    text = text or ""
+    while True:
+        start = text.find("{", position)
+        if start < 0:
+            break
+        try:
+            value, position = decoder.raw_decode(text, start)
+        except ValueError:
+            position = start + 1
+            continue
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(item, list) and isinstance(found.get(key), list):
+                    found[key] = found[key] + [x for x in item if x not in found[key]]
+                elif isinstance(item, dict) and isinstance(found.get(key), dict):
+                    # e.g. locally decided columns plus the model's decisions for the ambiguous ones.
+                    found[key] = dict(found[key], **item)
+                else:
+                    found[key] = item
+    return found or None
+
+
+def merge_strategies(texts: List[str]) -> dict:
+    """Merge per-shard JSON strategies key by key: dicts are unioned, lists concatenated."""
+    merged, unparsed = {}, []
+    for text in texts:
+        strategy = parse_strategy(text)
+        if not isinstance(strategy, dict):
+            unparsed.append(text)
+            continue
+        for key, value in strategy.items():
+            if isinstance(value, dict):
+                merged.setdefault(key, {}).update(value)
+            elif isinstance(value, list):
+                items = merged.setdefault(key, [])
+                items.extend(item for item in value if item not in items)
+            else:
+                merged.setdefault(key, []).append(value)
+    if unparsed:
+        merged["unparsed_shard_strategies"] = unparsed
+    return merged
+
+
+def merge_code(codes: List[str], shards: List[List[str]], drop: List[str] = ()) -> str:
+    # Single-line top-level imports are hoisted and de-duplicated; everything else keeps shard order.
+    imports, bodies = [], []
+    for i, (code, columns) in enumerate(zip(codes, shards)):
+        body = []
+        for line in extract_code(code).splitlines():
+            if line.startswith("```"):
+                continue
+            if line.startswith(("import ", "from ")) and not line.rstrip().endswith(("(", "\\")):
+                if line not in imports:
+                    imports.append(line)
+            else:
+                body.append(line)
+        preview = ", ".join(map(str, columns[:5])) + (", ..." if len(columns) > 5 else "")
+        bodies.append(f"# --- Shard {i + 1}/{len(codes)}: {preview} ---\n" + "\n".join(body).strip())
+    parts = ["\n".join(imports)] if imports else []
+    parts += bodies
+    if drop:
+        parts.append(f"# --- Columns dropped across shards ---\ndf = df.drop(columns={list(drop)!r}, errors='ignore')")
+    return "\n\n".join(parts) + "\n"
+
+
+def merge_shards(results: List[dict], shards: List[List[str]], target: str = None) -> dict:
+    failed = [f"shard {i + 1}: {result['error']}" for i, result in enumerate(results) if "error" in result]
+    if failed:
+        return {"error": "Sharded generation failed for " + "; ".join(failed)}
+    strategy = merge_strategies([result.get("strategy", "") for result in results])
+    # Drops are applied once, after every shard's code, so no shard loses a column another still needs.
+    drop = [col for col in strategy.get("columns_to_drop", []) if col != target]
+    if "columns_to_drop" in strategy:
+        strategy["columns_to_drop"] = drop
+    return {
+        "code": merge_code([result["code"] for result in results], shards, drop),
+        "strategy": json.dumps(strategy, indent=2, default=str),
+    }
@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype="uint64")
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    # Exact vectorized bit length of uint64 values: the float exponent, corrected where
+    # values above 2**53 round up to the next power of two.
+    length = np.frexp(x.astype("float64"))[1].astype("int64")
+    shift = np.maximum(length - 1, 0).astype("uint64")
+    return length - ((x >> shift) == 0) * (length > 0)
+
+
+class HyperLogLog:
+    """Mergeable cardinality sketch with relative standard error ~``error``."""
+
+    def __init__(self, error: float = 0.01):
+        self.p = min(18, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.m = 1 << self.p
+        self.registers = np.zeros(self.m, dtype="uint8")
+
+    def update(self, values: pd.Series):
+        if len(values) == 0:
+            return self
+        hashes = _hash_values(values)
+        idx = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, idx, rank.astype("uint8"))
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(2.0 ** -self.registers.astype("float64"))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            raw = self.m * math.log(self.m / zeros)
+        return int(round(raw))
+
+
+class HeavyHitters:
+    """Misra-Gries frequent items summary; counts undershoot by at most ``error * total``.
+
+    Each batch is counted exactly and cut down to its own ``1 / error`` largest counts
+    before merging, so only that many values per batch reach Python; memory stays at
+    ``1 / error`` counters whatever the cardinality, at the cost of one value_counts per batch.
+    """
+
+    def __init__(self, error: float = 0.01):
+        self.capacity = max(1, math.ceil(1 / error))
+        self.counts = {}
+        self.total = 0
+
+    def _merge_counts(self, counts: dict, total: int):
+        merged = dict(self.counts)
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+        if len(merged) > self.capacity:
+            cutoff = sorted(merged.values(), reverse=True)[self.capacity]
+            merged = {v: c - cutoff for v, c in merged.items() if c > cutoff}
+        self.counts = merged
+        self.total += total
+
+    def update(self, values: pd.Series):
+        counts = values.value_counts(sort=False)
+        total = int(counts.sum())
+        if len(counts) > self.capacity:
+            # The batch's own Misra-Gries summary: the top `capacity` counts, less the next one.
+            counts = counts.nlargest(self.capacity + 1)
+            counts = counts.iloc[:self.capacity] - counts.iloc[self.capacity]
+            counts = counts[counts > 0]
+        self._merge_counts(counts.to_dict(), total)
+        return self
+
+    def merge(self, other: "HeavyHitters"):
+        self._merge_counts(other.counts, other.total)
+        return self
+
+    def top(self, k: int = 3) -> list:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample over a stream (Algorithm R, vectorized per batch)."""
+
+    def __init__(self, size: int, random_state: int = 42):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self.rng = np.random.RandomState(random_state)
+
+    def select(self, n: int) -> list:
+        """Advance the stream by ``n`` items; return (slot, batch_position) pairs to store."""
+        fill = min(max(self.size - len(self.items), 0), n)
+        chosen = [(len(self.items) + i, i) for i in range(fill)]
+        if n > fill:
+            positions = np.arange(self.seen + fill + 1, self.seen + n + 1)
+            slots = (self.rng.random_sample(len(positions)) * positions).astype("int64")
+            chosen.extend((int(slots[i]), fill + int(i)) for i in np.flatnonzero(slots < self.size))
+        self.items.extend([None] * fill)
+        self.seen += n
+        return chosen
+
+    def update(self, values):
+        values = values.to_numpy() if isinstance(values, (pd.Series, pd.Index)) else np.asarray(values, dtype=object)
+        for slot, pos in self.select(len(values)):
+            value = values[pos]
+            self.items[slot] = value.item() if hasattr(value, "item") else value
+        return self
+
+    def merge(self, other: "ReservoirSample"):
+        # Each kept item stands for seen / len(items) stream elements of its side.
+        pool = self.items + other.items
+        if not pool:
+            self.seen += other.seen
+            return self
+        weights = np.array(
+            [self.seen / max(1, len(self.items))] * len(self.items)
+            + [other.seen / max(1, len(other.items))] * len(other.items),
+            dtype="float64"
+        )
+        chosen = self.rng.choice(len(pool), size=min(self.size, len(pool)), replace=False, p=weights / weights.sum())
+        self.items = [pool[i] for i in chosen]
+        self.seen += other.seen
+        return self
@@ -0,0 +1,199 @@
+import os
+from typing import Iterable, Iterator, Union
+
+import numpy as np
+import pandas as pd
+
+from .helper import (_distribution, _is_categorical, _round, column_moments, correlation_summary, finalize_moments,
+                     has_target)
+from .sketch import HeavyHitters, HyperLogLog, ReservoirSample
+
+
+def iter_chunks(source: Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]], chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Yield DataFrame chunks from a CSV/Parquet path, an in-memory frame or an iterable of frames."""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, max(len(source), 1), chunksize):
+            yield source.iloc[start:start + chunksize]
+    elif isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith((".parquet", ".pq")):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Reading Parquet in chunks requires 'pyarrow'") from e
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        yield from source
+
+
+def merge_moments(a: dict, b: dict) -> dict:
+    # Pairwise update of count/mean/M2/M3 (Chan et al., Pebay) so chunk statistics combine exactly.
+    na, nb = a["count"], b["count"]
+    n = na + nb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = b["mean"] - a["mean"]
+        mean = a["mean"] + delta * nb / n
+        m2 = a["m2"] + b["m2"] + delta ** 2 * na * nb / n
+        m3 = (a["m3"] + b["m3"] + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * b["m2"] - nb * a["m2"]) / n)
+    merged = {
+        "count": n,
+        "mean": np.where(na == 0, b["mean"], np.where(nb == 0, a["mean"], mean)),
+        "m2": np.where(na == 0, b["m2"], np.where(nb == 0, a["m2"], m2)),
+        "m3": np.where(na == 0, b["m3"], np.where(nb == 0, a["m3"], m3)),
+        "min": np.minimum(a["min"], b["min"]),
+        "max": np.maximum(a["max"], b["max"]),
+    }
+    return merged
+
+
+def _common_dtype(a: str, b: str) -> str:
+    # Chunks may infer different dtypes (e.g. int64 vs float64 once a NaN shows up).
+    if a == b:
+        return a
+    try:
+        both_numeric = all(pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(d)) for d in (a, b))
+    except TypeError:
+        both_numeric = False
+    return "float64" if both_numeric else "object"
+
+
+class StreamingProfiler:
+    """Builds the gen_des description incrementally; memory is bounded by chunk size."""
+
+    def __init__(self, sample_size: int = 2, error: float = 0.01, target: str = None,
+                 corr_top_k: int = 5, corr_max_rows: int = 10_000):
+        self.sample_size = sample_size
+        self.error = error
+        self.target = target if has_target(target) else None
+        self.corr_top_k = corr_top_k
+        self.columns = None
+        self.num_rows = 0
+        self._dtypes = {}
+        self._numeric = {}
+        self._categorical = {}
+        self._missing = {}
+        self._moments = {}
+        self._cardinality = {}
+        self._heavy = {}
+        self._examples = {}
+        self.corr_max_rows = corr_max_rows
+        self._rows = ReservoirSample(sample_size)
+        self._corr_rows = ReservoirSample(corr_max_rows, random_state=7)
+        self._corr_cols = []
+
+    def _init_columns(self, chunk: pd.DataFrame):
+        self.columns = list(chunk.columns)
+        for col in self.columns:
+            self._dtypes[col] = str(chunk[col].dtype)
+            self._numeric[col] = pd.api.types.is_numeric_dtype(chunk[col])
+            self._categorical[col] = _is_categorical(chunk[col])
+            self._missing[col] = 0
+            self._cardinality[col] = HyperLogLog(self.error)
+            self._examples[col] = ReservoirSample(5)
+
+    def update(self, chunk: pd.DataFrame):
+        if self.columns is None:
+            self._init_columns(chunk)
+        chunk = chunk.reindex(columns=self.columns)
+        n = len(chunk)
+        if n == 0:
+            return self
+
+        for col in self.columns:
+            values = chunk[col]
+            dtype = str(values.dtype)
+            if dtype != self._dtypes[col] and not values.isna().all():
+                self._dtypes[col] = _common_dtype(self._dtypes[col], dtype)
+                self._numeric[col] = self._numeric[col] and pd.api.types.is_numeric_dtype(values)
+                self._categorical[col] = self._categorical[col] or _is_categorical(values)
+
+        missing = chunk.isna().sum()
+        for col in self.columns:
+            self._missing[col] += int(missing[col])
+            values = chunk[col].dropna()
+            self._cardinality[col].update(values)
+            self._examples[col].update(values)
+            if self._categorical[col]:
+                self._heavy.setdefault(col, HeavyHitters(self.error)).update(values)
+
+        numeric_cols = [col for col in self.columns if self._numeric[col]]
+        if numeric_cols:
+            arr = chunk[numeric_cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            moments = dict(zip(numeric_cols, _split(column_moments(arr), len(numeric_cols))))
+            for col in numeric_cols:
+                self._moments[col] = merge_moments(self._moments[col], moments[col]) if col in self._moments else moments[col]
+            if numeric_cols != self._corr_cols:
+                # The numeric column set changed; restart the correlation sample.
+                self._corr_cols = numeric_cols
+                self._corr_rows = ReservoirSample(self.corr_max_rows, random_state=7)
+            _store(self._corr_rows, n, lambda idx: list(arr[idx]))
+
+        _store(self._rows, n, lambda idx: chunk.iloc[idx].to_dict(orient="records"))
+        self.num_rows += n
+        return self
+
+    def _correlation(self) -> dict:
+        if not self._corr_rows.items or not self._corr_cols:
+            return {}
+        sample = pd.DataFrame(np.vstack(self._corr_rows.items), columns=self._corr_cols)
+        return correlation_summary(sample, target=self.target, top_k=self.corr_top_k, max_rows=self.corr_max_rows)
+
+    def describe(self) -> dict:
+        if self.columns is None:
+            return {"columns": {}, "correlation": {}, "num_rows": 0, "num_columns": 0, "sample_rows": []}
+        description = {
+            "columns": {},
+            "correlation": self._correlation(),
+            "num_rows": self.num_rows,
+            "num_columns": len(self.columns),
+            "sample_rows": list(self._rows.items)
+        }
+        for col in self.columns:
+            col_info = {
+                "dtype": self._dtypes[col],
+                "missing_pct": round(self._missing[col] / self.num_rows * 100, 1) if self.num_rows else 0.0,
+                "unique_count": self._cardinality[col].estimate(),
+                "example_values": self._examples[col].items
+            }
+            if self._numeric[col] and col in self._moments:
+                final = finalize_moments(self._moments[col])
+                count = self._moments[col]["count"]
+                has_data = count > 0
+                col_info.update({
+                    "min": _round(final["min"]) if has_data else None,
+                    "max": _round(final["max"]) if has_data else None,
+                    "mean": _round(final["mean"]) if has_data else None,
+                    "std": _round(final["std"]) if has_data else None,
+                    "skew": _round(final["skew"]) if count > 1 else None,
+                })
+            heavy = self._heavy.get(col)
+            if self._categorical[col] and heavy is not None and heavy.total:
+                col_info["value_distribution"] = _distribution(heavy.top(3), heavy.total)
+            description["columns"][col] = col_info
+        return description
+
+
+def _store(reservoir: ReservoirSample, n: int, take):
+    # Only the rows that enter the reservoir are materialized.
+    chosen = reservoir.select(n)
+    if chosen:
+        for (slot, _), row in zip(chosen, take([pos for _, pos in chosen])):
+            reservoir.items[slot] = row
+
+
+def _split(moments: dict, n_columns: int) -> list:
+    return [{key: values[i] for key, values in moments.items()} for i in range(n_columns)]
+
+
+def profile_stream(source, chunksize: int = 100_000, sample_size: int = 2, error: float = 0.01,
+                   target: str = None, corr_top_k: int = 5, corr_max_rows: int = 10_000) -> dict:
+    """Describe a path, frame or iterable of chunks without materializing it."""
+    profiler = StreamingProfiler(sample_size=sample_size, error=error, target=target,
+                                 corr_top_k=corr_top_k, corr_max_rows=corr_max_rows)
+    for chunk in iter_chunks(source, chunksize=chunksize):
+        profiler.update(chunk)
+    return profiler.describe()
@@ -0,0 +1,258 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Pipelines record what a run spent its time on (profiling phases, model calls, local
+# checks, refine iterations) into the RunReport of the active Tracer.run.
+# Nothing is recorded, and instrumentation costs a context-variable lookup, when no
+# run is active. Hooks receive every span and call as it finishes; with
+# opentelemetry=True the same spans are also exported through the OpenTelemetry API.
+
+_RUN = contextvars.ContextVar("autoprocess_run", default=None)
+_SPAN = contextvars.ContextVar("autoprocess_span", default=None)
+
+
+class RunReport:
+    def __init__(self, name: str, tracer: "Tracer"):
+        self.name = name
+        self.tracer = tracer
+        self.started = time.time()
+        self.duration = None
+        self.error = None
+        self.spans = []
+        self.calls = []
+        self.counters = {}
+        self.profile = {"phases": {}, "columns": {}}
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, event: dict):
+        with self._lock:
+            getattr(self, kind).append(event)
+        self.tracer.emit(dict(event, type=kind[:-1], run=self.name))
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def time_profile(self, section: str, key, seconds: float):
+        with self._lock:
+            bucket = self.profile[section]
+            bucket[key] = bucket.get(key, 0.0) + seconds
+
+    def to_dict(self) -> dict:
+        calls = self.calls
+        return {
+            "name": self.name,
+            "duration": self.duration,
+            "error": self.error,
+            "summary": {
+                "model_calls": len(calls),
+                "cache_hits": sum(call["cache_hit"] for call in calls),
+                "model_time": round(sum(call["duration"] for call in calls), 4),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+                "response_tokens": sum(call["response_tokens"] for call in calls),
+                **self.counters,
+            },
+            "spans": list(self.spans),
+            "calls": list(calls),
+            "profile": {"phases": dict(self.profile["phases"]), "columns": dict(self.profile["columns"])},
+        }
+
+
+class Tracer:
+    """Collects run reports and forwards span/call events to ``hooks``.
+
+    Each hook is called with one event dict (``type`` is "span", "call" or "run").
+    """
+
+    def __init__(self, hooks=(), opentelemetry: bool = False):
+        self.hooks = list(hooks)
+        self._otel = None
+        if opentelemetry:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError("Tracer(opentelemetry=True) requires 'opentelemetry-api' "
+                                  "(pip install autoprocess_iitg[tracing])") from e
+            self._otel = trace.get_tracer("autoprocess")
+
+    def emit(self, event: dict):
+        for hook in self.hooks:
+            hook(event)
+
+    @contextmanager
+    def run(self, name: str):
+        active = _RUN.get()
+        if active is not None:
+            # Nested pipeline calls (e.g. from the orchestrator) report into the outer run.
+            with span(name):
+                yield active
+            return
+        report = RunReport(name, self)
+        token = _RUN.set(report)
+        start = time.perf_counter()
+        try:
+            with span(name):
+                yield report
+        except BaseException as e:
+            report.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            report.duration = round(time.perf_counter() - start, 4)
+            _RUN.reset(token)
+            self.emit({"type": "run", "run": name, "report": report.to_dict()})
+
+
+def current_report():
+    return _RUN.get()
+
+
+def _otel_attributes(attributes: dict) -> dict:
+    return {key: value for key, value in attributes.items() if isinstance(value, (str, bool, int, float))}
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block; the yielded dict can be filled with attributes known only at the end."""
+    report = _RUN.get()
+    if report is None:
+        yield attributes
+        return
+    parent = _SPAN.get()
+    token = _SPAN.set(name)
+    otel = report.tracer._otel.start_as_current_span(name) if report.tracer._otel is not None else None
+    otel_span = otel.__enter__() if otel is not None else None
+    start = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        duration = round(time.perf_counter() - start, 6)
+        _SPAN.reset(token)
+        if otel is not None:
+            otel_span.set_attributes(_otel_attributes(attributes))
+            otel.__exit__(None, None, None)
+        report.add("spans", {"name": name, "parent": parent, "duration": duration, "attributes": attributes})
+
+
+def count(name: str, n: int = 1):
+    report = _RUN.get()
+    if report is not None:
+        report.count(name, n)
+
+
+@contextmanager
+def timed(section: str, key):
+    # Profiling timings (gen_des phases and columns) are aggregated, not kept as spans.
+    report = _RUN.get()
+    if report is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report.time_profile(section, key, time.perf_counter() - start)
+
+
+def _prompt_size(prompt) -> int:
+    return len(prompt) if isinstance(prompt, str) else sum(len(str(part)) for part in prompt)
+
+
+class TracedModel:
+    """Records every model call made during an active run; a pass-through otherwise."""
+
+    def __init__(self, model):
+        self.model = model
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+
+    def _record(self, report, prompt, response, start, error=None):
+        duration = time.perf_counter() - start
+        try:
+            text = (response.text or "") if response is not None else ""
+        except ValueError:
+            text = ""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        report.add("calls", {
+            "span": _SPAN.get(),
+            "duration": round(duration, 6),
+            "prompt_chars": _prompt_size(prompt),
+            "response_chars": len(text),
+            # Without usage metadata (cache hits, local stand-ins) tokens are estimated.
+            "prompt_tokens": prompt_tokens if prompt_tokens is not None else _prompt_size(prompt) // 4 + 1,
+            "response_tokens": response_tokens if response_tokens is not None else len(text) // 4,
+            "tokens_estimated": prompt_tokens is None,
+            "cache_hit": type(response).__name__ == "CachedResponse",
+            "error": error,
+        })
+
+    def generate_content(self, prompt, **kwargs):
+        report = _RUN.get()
+        if report is None:
+            return self.model.generate_content(prompt, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            self._record(report, prompt, None, start, f"{type(e).__name__}: {e}")
+            raise
+        self._record(report, prompt, response, start)
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        from .chain import agenerate_content
+        report = _RUN.get()
+        if report is None:
+            return await agenerate_content(self.model, prompt, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = await agenerate_content(self.model, prompt, **kwargs)
+        except Exception as e:
+            self._record(report, prompt, None, start, f"{type(e).__name__}: {e}")
+            raise
+        self._record(report, prompt, response, start)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def _attach(owner, result, report):
+    owner.last_report = report.to_dict()
+    if isinstance(result, dict):
+        result = dict(result, report=owner.last_report)
+    return result
+
+
+def traced(name: str):
+    """Run a pipeline method inside ``self.tracer.run(name)`` and attach the report.
+
+    Dict results get a ``report`` key; the report is also kept as ``self.last_report``.
+    Calls nested in another run only add to that run.
+    """
+    def decorate(method):
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if self.tracer is None:
+                    return await method(self, *args, **kwargs)
+                outer = _RUN.get()
+                with self.tracer.run(name) as report:
+                    result = await method(self, *args, **kwargs)
+                return result if outer is not None else _attach(self, result, report)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.tracer is None:
+                return method(self, *args, **kwargs)
+            outer = _RUN.get()
+            with self.tracer.run(name) as report:
+                result = method(self, *args, **kwargs)
+            return result if outer is not None else _attach(self, result, report)
+        return wrapper
+    return decorate
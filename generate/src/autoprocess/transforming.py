@@ -1,11 +1,30 @@
+import functools
+import json
+
+from .concurrency import arun_all, run_all
 from .helper import*
+from .rules import check_engine, escalation_prompt, resolves_locally, transformation_plan, with_local_strategy
+from .sharding import column_shards, merge_shards, shard_context, shard_description
+from .validation import LocalValidation, dry_run_sample, local_check
 from typing import Dict, Any, List
 
 
 class DataTransformationPipeline:
-    def __init__(self, api_key: str):
-        self.model = initialize_gemini(api_key)
-        if self.model is None:
+    def __init__(self, api_key: str = None, cache=None, model=None, strategy_engine: str = "llm", local_validation: bool = False,
+                 candidates: int = 1, prompt_tokens: int = PROMPT_TOKENS, scheduler=None, priority: int = 0,
+                 tracer=None):
+        self.strategy_engine = check_engine(strategy_engine)
+        # Validate by parsing and dry-running the code on a data sample instead of asking the model.
+        self.local_validation = local_validation
+        # With candidates > 1, code is requested that many times at once and the first passing one wins.
+        self.candidates = candidates
+        # Token budget for the dataset profile embedded in strategy prompts.
+        self.prompt_tokens = prompt_tokens
+        # Optional Tracer; public methods then return a run report with the code.
+        self.tracer = tracer
+        self.model = prepare_model(load_model(model, api_key, self.strategy_engine), cache=cache,
+                                   scheduler=scheduler, priority=priority)
+        if self.model is None and self.strategy_engine != "local":
             print("API not valid")
         # Strategy prompt: generate a structured transformation plan.
         self.strategy_prompt = (
@@ -39,66 +58,164 @@ class DataTransformationPipeline:
             "If the code is production-ready, reply with 'production-ready' or 'no errors'. Otherwise, provide specific suggestions for improvement."
         )
 
+    @traced("generate_transformation_code")
     def generate_transformation_code(
         self,
         dataset,
         target: str = "",
         skip_encoding: List[str] = None,
         skip_normalisation: List[str] = None,
-        max_iterations: int = 3
+        max_iterations: int = 3,
+        profile: dict = None,
+        shard_size: int = None,
+        max_concurrency: int = 8
     ) -> Dict[str, Any]:
-        if self.model is None:
+        if self.model is None and self.strategy_engine != "local":
             return {"error": "API not valid"}
+        dataset_description = describe_dataset(dataset, target=target, profile=profile)
+        if shard_size and len(dataset_description["columns"]) > shard_size:
+            sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+            shards, tasks = self._shard_tasks(dataset_description, target, skip_encoding, skip_normalisation,
+                                              max_iterations, sample, shard_size)
+            return merge_shards(run_all(tasks, max_concurrency=max_concurrency), shards, target)
+        plan = None
+        if self.strategy_engine != "llm":
+            plan = transformation_plan(dataset_description, target, skip_encoding, skip_normalisation)
+            if resolves_locally(self.strategy_engine, plan):
+                return {"code": plan.code}
+        sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+        return run_chain(
+            self._transformation_chain(dataset_description, target, skip_encoding, skip_normalisation, max_iterations, plan, sample),
+            self.model
+        )
+
+    @traced("generate_transformation_code")
+    async def agenerate_transformation_code(
+        self,
+        dataset,
+        target: str = "",
+        skip_encoding: List[str] = None,
+        skip_normalisation: List[str] = None,
+        max_iterations: int = 3,
+        profile: dict = None,
+        shard_size: int = None,
+        max_concurrency: int = 8
+    ) -> Dict[str, Any]:
+        if self.model is None and self.strategy_engine != "local":
+            return {"error": "API not valid"}
+        dataset_description = await run_blocking(describe_dataset, dataset, target=target, profile=profile)
+        if shard_size and len(dataset_description["columns"]) > shard_size:
+            sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+            shards, tasks = self._shard_tasks(dataset_description, target, skip_encoding, skip_normalisation,
+                                              max_iterations, sample, shard_size)
+            return merge_shards(await arun_all(tasks, max_concurrency=max_concurrency), shards, target)
+        plan = None
+        if self.strategy_engine != "llm":
+            plan = transformation_plan(dataset_description, target, skip_encoding, skip_normalisation)
+            if resolves_locally(self.strategy_engine, plan):
+                return {"code": plan.code}
+        sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+        return await arun_chain(
+            self._transformation_chain(dataset_description, target, skip_encoding, skip_normalisation, max_iterations, plan, sample),
+            self.model
+        )
+
+    def _shard_tasks(self, dataset_description, target, skip_encoding, skip_normalisation, max_iterations, sample, shard_size):
+        # Each shard is planned and coded on its own slice of the profile (plus the target).
+        shards = column_shards(dataset_description, shard_size, target)
+        tasks = [
+            functools.partial(self._agenerate_shard, shard_description(dataset_description, columns, target), target,
+                              skip_encoding, skip_normalisation, max_iterations, sample,
+                              shard_context(i, len(shards), columns, target))
+            for i, columns in enumerate(shards)
+        ]
+        return shards, tasks
+
+    async def _agenerate_shard(self, dataset_description, target, skip_encoding, skip_normalisation, max_iterations,
+                               sample, context):
+        plan = None
+        if self.strategy_engine != "llm":
+            plan = transformation_plan(dataset_description, target, skip_encoding, skip_normalisation)
+            if resolves_locally(self.strategy_engine, plan):
+                return {"code": plan.code, "strategy": json.dumps(plan.strategy, default=str)}
+        return await arun_chain(
+            self._transformation_chain(dataset_description, target, skip_encoding, skip_normalisation, max_iterations,
+                                       plan, sample, context),
+            self.model
+        )
+
+    def _transformation_chain(self, dataset_description, target, skip_encoding, skip_normalisation, max_iterations, plan=None, sample=None,
+                              context=""):
         if skip_encoding is None:
             skip_encoding = []
         if skip_normalisation is None:
             skip_normalisation = []
-        dataset_description = gen_des(dataset)
         # Build the strategy prompt with context details
         combined_strategy_prompt = "\n".join([
             self.strategy_prompt,
-            f"Dataset Context: {dataset_description}",
-            f"Target Variable: {target}" if target else "",
+            f"Dataset Context:\n{compact_description(dataset_description, target, plan.ambiguous if plan else (), self.prompt_tokens)}",
+            f"Target Variable: {target}" if has_target(target) else "",
             f"Skip categorical encoding for: {skip_encoding}" if skip_encoding else "Apply encoding for all applicable categorical columns.",
-            f"Skip normalization for: {skip_normalisation}" if skip_normalisation else "Apply normalization for all applicable numerical columns."
+            f"Skip normalization for: {skip_normalisation}" if skip_normalisation else "Apply normalization for all applicable numerical columns.",
+            escalation_prompt(plan) if plan else "",
+            context
         ])
-        strategy_response = self.model.generate_content(combined_strategy_prompt)
+        strategy_response = yield combined_strategy_prompt
         if not strategy_response.text:
             raise ValueError("Failed to generate transformation strategy")
-        strategy_text = strategy_response.text.strip()
+        strategy_text = with_local_strategy(plan, strategy_response.text.strip())
 
         # Build the code prompt using the generated strategy
         combined_code_prompt = "\n".join([
             self.code_prompt,
             f"Strategy: {strategy_text}"
         ])
-        code_response = self.model.generate_content(combined_code_prompt)
-        if not code_response.text:
-            raise ValueError("Failed to generate transformation code")
-        current_code = code_response.text.strip()
+        current_code = validation_response = None
+        if self.candidates > 1:
+            # Without a winner, refinement starts from a failed candidate and its feedback.
+            current_code, validation_response = yield from speculate(
+                combined_code_prompt, self.candidates, lambda code: self._validation_step(code, sample), self._passed)
+            if current_code is not None and validation_response is None:
+                return {"code": current_code, "strategy": strategy_text}
+        if current_code is None:
+            code_response = yield combined_code_prompt
+            if not code_response.text:
+                raise ValueError("Failed to generate transformation code")
+            current_code = code_response.text.strip()
 
         # Iteratively refine the code until it is production-ready
         iteration = 0
         while iteration < max_iterations:
-            combined_val_prompt = "\n".join([self.validation_prompt, current_code])
-            validation_response = self.model.generate_content(combined_val_prompt)
+            if validation_response is None:
+                validation_response = yield self._validation_step(current_code, sample)
             if not validation_response.text:
                 raise ValueError("Failed to validate generated transformation code")
-            feedback = validation_response.text.lower()
-            if "production-ready" in feedback or "no errors" in feedback:
+            if self._passed(validation_response):
                 break
-            else:
-                refinement_prompt = "\n".join([
-                    f"Feedback: {validation_response.text}",
-                    "Please refine the Python code accordingly. Output only the refined Python code.",
-                    f"Current Code:\n{current_code}"
-                ])
-                refinement_response = self.model.generate_content(refinement_prompt)
-                if not refinement_response.text:
-                    raise ValueError("Failed to refine transformation code after feedback.")
-                current_code = refinement_response.text.strip()
-                iteration += 1
+            refinement_prompt = "\n".join([
+                f"Feedback: {validation_response.text}",
+                "Please refine the Python code accordingly. Output only the refined Python code.",
+                f"Current Code:\n{current_code}"
+            ])
+            refinement_response = yield refinement_prompt
+            if not refinement_response.text:
+                raise ValueError("Failed to refine transformation code after feedback.")
+            current_code = refinement_response.text.strip()
+            validation_response = None
+            count("refine_iterations")
+            iteration += 1
+
+        return {"code": current_code, "strategy": strategy_text}
+
+    def _validation_step(self, code, sample):
+        if sample is not None:
+            return local_check(code, sample, "_transformed")
+        return "\n".join([self.validation_prompt, code])
 
-        return {"code": current_code}
+    def _passed(self, validation_response) -> bool:
+        if isinstance(validation_response, LocalValidation):
+            return validation_response.ok
+        feedback = validation_response.text.lower()
+        return "production-ready" in feedback or "no errors" in feedback
     
     
\ No newline at end of file
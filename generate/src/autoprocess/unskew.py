@@ -1,12 +1,42 @@
 from .helper import*
+from .rules import check_engine, escalation_prompt, resolves_locally, skew_plan, with_local_strategy
+from .validation import LocalValidation, dry_run_sample, local_check
 
 
+def _is_binary(info: dict) -> bool:
+    return str(info["dtype"]).startswith("bool") or info.get("unique_count", 3) <= 2
+
+
+def skewed_columns(description: dict, threshold: float = 1.0) -> list:
+    """Numeric columns whose profiled |skew| is at least ``threshold``, most skewed first.
+
+    Binary columns (bool dtype or at most two distinct values) are never selected: a rare
+    indicator is highly skewed, but there is nothing to unskew.
+    """
+    skews = {
+        col: abs(info["skew"]) for col, info in description["columns"].items()
+        if info.get("skew") is not None and info["skew"] == info["skew"] and abs(info["skew"]) >= threshold
+        and not _is_binary(info)
+    }
+    return sorted(skews, key=skews.get, reverse=True)
+
 
 class SkewCorrectionPipeline:
-    def __init__(self, api_key: str):
-        
-        self.model = initialize_gemini(api_key)
-        if not self.model:
+    def __init__(self, api_key: str = None, cache=None, model=None, strategy_engine: str = "llm", local_validation: bool = False,
+                 candidates: int = 1, prompt_tokens: int = PROMPT_TOKENS, scheduler=None, priority: int = 0,
+                 tracer=None):
+        self.strategy_engine = check_engine(strategy_engine)
+        # Validate by parsing and dry-running the code on a data sample instead of asking the model.
+        self.local_validation = local_validation
+        # With candidates > 1, code is requested that many times at once and the first passing one wins.
+        self.candidates = candidates
+        # Token budget for the dataset profile embedded in strategy prompts.
+        self.prompt_tokens = prompt_tokens
+        # Optional Tracer; public methods then return a run report with the code.
+        self.tracer = tracer
+        self.model = prepare_model(load_model(model, api_key, self.strategy_engine), cache=cache,
+                                   scheduler=scheduler, priority=priority)
+        if not self.model and self.strategy_engine != "local":
             raise ValueError("Invalid API key or model initialization failed")
         
          # Strategy prompt: Recommend optimal skew correction method.
@@ -36,6 +66,18 @@ class SkewCorrectionPipeline:
             "-don't use sample data just consider df as name of dataset and perform strategy"
         )
 
+        # Batch code prompt: one code block covering several columns.
+        self.batch_code_prompt = (
+            "Generate production-ready Python code implementing the skew correction methods described, one per column. Requirements:\n"
+            "- Input is a clean DataFrame named 'df' (nulls and dtypes already handled)\n"
+            "- For each of the columns {cols}, apply the method recommended for that column and create a new column '<column>_unskewed'\n"
+            "- Group columns that share a method so each transformer is fitted once\n"
+            "- Handle edge cases (e.g. zeros/negatives) if needed\n"
+            "- Preserve the original data\n"
+            "- Include all necessary imports and clear comments explaining your choices\n"
+            "- Don't use sample data, just consider df as name of dataset and perform strategy"
+        )
+
         # Validation prompt: Check the generated code for correctness.
         self.validation_prompt = (
             "Validate the following Python code for skew correction. Check for:\n"
@@ -48,51 +90,121 @@ class SkewCorrectionPipeline:
             "Otherwise, provide specific feedback for necessary improvements."
         )
 
-    def generate_skew_correction(self, dataset, column_name, max_iterations=3):
+    @traced("generate_skew_correction")
+    def generate_skew_correction(self, dataset, column_name, max_iterations=3, profile: dict = None):
         
-        dataset_description = gen_des(dataset)
+        dataset_description = describe_dataset(dataset, profile=profile)
+        sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+        return self._run(dataset_description, column_name, max_iterations, sample)
+
+    @traced("generate_skew_correction")
+    async def agenerate_skew_correction(self, dataset, column_name, max_iterations=3, profile: dict = None):
+        dataset_description = await run_blocking(describe_dataset, dataset, profile=profile)
+        sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+        return await self._arun(dataset_description, column_name, max_iterations, sample)
+
+    @traced("generate_batch_skew_correction")
+    def generate_batch_skew_correction(self, dataset, columns: list = None, skew_threshold: float = 1.0,
+                                       max_iterations=3, profile: dict = None):
+        # One profile, one strategy and one code block for many columns. Without an
+        # explicit list, every numeric column with |skew| >= skew_threshold is corrected.
+        dataset_description = describe_dataset(dataset, profile=profile)
+        columns = columns if columns is not None else skewed_columns(dataset_description, skew_threshold)
+        if not columns:
+            return ""
+        sample = dry_run_sample(dataset, dataset_description) if self.local_validation else None
+        return self._run(dataset_description, list(columns), max_iterations, sample)
+
+    @traced("generate_batch_skew_correction")
+    async def agenerate_batch_skew_correction(self, dataset, columns: list = None, skew_threshold: float = 1.0,
+                                              max_iterations=3, profile: dict = None):
+        dataset_description = await run_blocking(describe_dataset, dataset, profile=profile)
+        columns = columns if columns is not None else skewed_columns(dataset_description, skew_threshold)
+        if not columns:
+            return ""
+        sample = await run_blocking(dry_run_sample, dataset, dataset_description) if self.local_validation else None
+        return await self._arun(dataset_description, list(columns), max_iterations, sample)
+
+    def _plan(self, dataset_description, column_name):
+        return skew_plan(dataset_description, column_name) if self.strategy_engine != "llm" else None
+
+    def _run(self, dataset_description, column_name, max_iterations, sample=None):
+        plan = self._plan(dataset_description, column_name)
+        if resolves_locally(self.strategy_engine, plan):
+            return plan.code
+        return run_chain(self._skew_chain(dataset_description, column_name, max_iterations, plan, sample), self.model)
+
+    async def _arun(self, dataset_description, column_name, max_iterations, sample=None):
+        plan = self._plan(dataset_description, column_name)
+        if resolves_locally(self.strategy_engine, plan):
+            return plan.code
+        return await arun_chain(self._skew_chain(dataset_description, column_name, max_iterations, plan, sample), self.model)
+
+    def _skew_chain(self, dataset_description, column_name, max_iterations, plan=None, sample=None):
+        batch = isinstance(column_name, list)
+        columns = (column_name if batch else [column_name]) + (plan.ambiguous if plan else [])
         # Step 1: Generate transformation strategy.
         complete_strategy_prompt = "\n".join([
             self.strategy_prompt,
-            f"Dataset Context: {dataset_description}",
-            f"Column: {column_name}"
+            f"Dataset Context:\n{compact_description(dataset_description, focus=columns, max_tokens=self.prompt_tokens)}",
+            f"Columns: {column_name}\nRecommend a method for each column and return a JSON object mapping column to method and reason."
+            if batch else f"Column: {column_name}",
+            escalation_prompt(plan) if plan else ""
         ])
-        strategy_response = self.model.generate_content(complete_strategy_prompt)
+        strategy_response = yield complete_strategy_prompt
         if not strategy_response.text:
             raise ValueError("Failed to generate transformation strategy")
         
         # Step 2: Generate initial skew correction code using the strategy.
         complete_code_prompt = "\n".join([
-            self.code_prompt.format(col=column_name),
-            f"Strategy: {strategy_response.text}"
+            self.batch_code_prompt.format(cols=column_name) if batch else self.code_prompt.format(col=column_name),
+            f"Strategy: {with_local_strategy(plan, strategy_response.text)}"
         ])
-        code_response = self.model.generate_content(complete_code_prompt)
-        if not code_response.text:
-            raise ValueError("Failed to generate skew correction code")
-        
-        current_code = code_response.text
+        current_code = validation_response = None
+        if self.candidates > 1:
+            # Without a winner, refinement starts from a failed candidate and its feedback.
+            current_code, validation_response = yield from speculate(
+                complete_code_prompt, self.candidates, lambda code: self._validation_step(code, sample), self._passed, str)
+            if current_code is not None and validation_response is None:
+                return current_code
+        if current_code is None:
+            code_response = yield complete_code_prompt
+            if not code_response.text:
+                raise ValueError("Failed to generate skew correction code")
+            current_code = code_response.text
         iteration = 0
 
         # Iteratively refine the code until validation indicates production-readiness.
         while iteration < max_iterations:
-            complete_validation_prompt = "\n".join([self.validation_prompt, current_code])
-            validation_response = self.model.generate_content(complete_validation_prompt)
+            if validation_response is None:
+                validation_response = yield self._validation_step(current_code, sample)
             if not validation_response.text:
                 raise ValueError("Failed to validate the generated code")
-            feedback_text = validation_response.text.lower()
-            if "production-ready" in feedback_text or "no errors" in feedback_text:
+            if self._passed(validation_response):
                 break
-            else:
-                updated_code_prompt = "\n".join([
-                    f"Feedback: {validation_response.text}",
-                    "Refine the previously generated Python code accordingly. Output only the refined code.",
-                    f"Current Code:\n{current_code}"
-                ])
-                refinement_response = self.model.generate_content(updated_code_prompt)
-                if not refinement_response.text:
-                    raise ValueError("Failed to refine skew correction code after feedback")
-                current_code = refinement_response.text
-                iteration += 1
+            updated_code_prompt = "\n".join([
+                f"Feedback: {validation_response.text}",
+                "Refine the previously generated Python code accordingly. Output only the refined code.",
+                f"Current Code:\n{current_code}"
+            ])
+            refinement_response = yield updated_code_prompt
+            if not refinement_response.text:
+                raise ValueError("Failed to refine skew correction code after feedback")
+            current_code = refinement_response.text
+            validation_response = None
+            count("refine_iterations")
+            iteration += 1
 
         return current_code
 
+    def _validation_step(self, code, sample):
+        if sample is not None:
+            return local_check(code, sample, "_unskewed")
+        return "\n".join([self.validation_prompt, code])
+
+    def _passed(self, validation_response) -> bool:
+        if isinstance(validation_response, LocalValidation):
+            return validation_response.ok
+        feedback_text = validation_response.text.lower()
+        return "production-ready" in feedback_text or "no errors" in feedback_text
+
@@ -0,0 +1,144 @@
+import ast
+import functools
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from typing import List, NamedTuple
+
+import pandas as pd
+
+from .helper import extract_code
+from .streaming import iter_chunks
+from .tracing import span
+
+# Cheap checks that run before (or instead of) asking the model to review its own code:
+# does it parse, does it mention the expected output columns, and does it actually run
+# on a small sample. The dry run happens in an isolated subprocess (python -I, a scratch
+# working directory, a minimal environment without the caller's API keys, and address
+# space and CPU limits on POSIX) so a hang, crash or runaway allocation in generated code
+# cannot take the caller down with it.
+
+RESULT_MARKER = "__autoprocess_result__"
+READY_MARKER = "__autoprocess_ready__"
+MEMORY_LIMIT = 2 * 1024 ** 3
+# The parent's import path comes first on stdin: -I drops PYTHONPATH and the user site,
+# where pandas may be installed.
+RUNNER = """
+import pickle, sys
+sys.path[:0] = [path for path in pickle.load(sys.stdin.buffer) if path not in sys.path]
+try:
+    import resource
+    memory, cpu = int(sys.argv[1]), int(sys.argv[2])
+    if memory > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+except ImportError:
+    pass
+code, df = pickle.load(sys.stdin.buffer)
+print(%r, flush=True)
+namespace = {"df": df}
+try:
+    exec(compile(code, "<generated>", "exec"), namespace)
+    result = namespace.get("df")
+    if not hasattr(result, "columns"):
+        raise TypeError(f"df is a {type(result).__name__} after running the code, expected a DataFrame")
+    outcome = {"columns": [str(c) for c in result.columns], "rows": len(result)}
+except BaseException as e:
+    outcome = {"error": f"{type(e).__name__}: {e}"}
+sys.stdout.flush()
+print(%r + repr(outcome))
+""" % (READY_MARKER, RESULT_MARKER)
+
+
+class LocalValidation(NamedTuple):
+    ok: bool
+    errors: List[str]
+
+    @property
+    def text(self) -> str:
+        # Mirrors the model response interface so it can feed the refinement prompt.
+        if self.ok:
+            return "Local validation passed: the code compiles and runs on a data sample."
+        return "Local validation found these errors:\n" + "\n".join(f"- {e}" for e in self.errors)
+
+
+def _environment(workdir: str) -> dict:
+    # Nothing from the caller's environment beyond search paths, so keys and tokens stay out.
+    env = {"PATH": os.environ.get("PATH", os.defpath), "HOME": workdir, "TMPDIR": workdir, "LC_ALL": "C.UTF-8"}
+    if "LD_LIBRARY_PATH" in os.environ:
+        env["LD_LIBRARY_PATH"] = os.environ["LD_LIBRARY_PATH"]
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        env[var] = "1"
+    if os.name == "nt":
+        env["SYSTEMROOT"] = os.environ.get("SYSTEMROOT", "")
+    return env
+
+
+def _dry_run(code: str, sample: pd.DataFrame, timeout: float, memory_limit: int = MEMORY_LIMIT) -> dict:
+    # The limits are set by the child itself before the generated code is loaded;
+    # preexec_fn is not safe while speculative candidates validate on other threads.
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-I", "-c", RUNNER, str(memory_limit or 0), str(int(timeout) + 1)],
+                input=pickle.dumps([path for path in sys.path if path]) + pickle.dumps((code, sample)),
+                capture_output=True, timeout=timeout, cwd=workdir, env=_environment(workdir),
+            )
+        except subprocess.TimeoutExpired:
+            return {"error": f"Dry run did not finish within {timeout} seconds"}
+    lines = completed.stdout.decode("utf-8", "replace").splitlines()
+    for line in reversed(lines):
+        if line.startswith(RESULT_MARKER):
+            return ast.literal_eval(line[len(RESULT_MARKER):])
+    stderr = completed.stderr.decode("utf-8", "replace").strip().splitlines()
+    last = stderr[-1] if stderr else "no output"
+    if READY_MARKER not in lines:
+        # The runner failed before reaching the generated code; refining the code cannot fix that.
+        raise RuntimeError(f"The dry-run subprocess could not load the sample ({last}); "
+                           "disable local_validation or make pandas importable without environment variables")
+    return {"error": f"Dry run exited with code {completed.returncode}: {last}"}
+
+
+def validate_locally(code: str, sample: pd.DataFrame, suffix: str = None, timeout: float = 10.0,
+                     memory_limit: int = MEMORY_LIMIT) -> LocalValidation:
+    """Parse, compile and dry-run generated code on ``sample`` (bound to ``df``).
+
+    ``memory_limit`` caps the dry run's address space in bytes (POSIX only; None disables).
+    Raises RuntimeError when the subprocess fails before the code runs (e.g. it cannot
+    import pandas), since that is not a defect in the code.
+    """
+    with span("local_validation", rows=len(sample)) as attributes:
+        result = _validate(extract_code(code), sample, suffix, timeout, memory_limit)
+        attributes["ok"] = result.ok
+    return result
+
+
+def _validate(code: str, sample: pd.DataFrame, suffix: str, timeout: float, memory_limit: int) -> LocalValidation:
+    try:
+        compile(ast.parse(code), "<generated>", "exec")
+    except SyntaxError as e:
+        return LocalValidation(False, [f"SyntaxError on line {e.lineno}: {e.msg}"])
+    errors = []
+    if suffix and suffix not in code:
+        errors.append(f"The code never creates columns with the '{suffix}' suffix")
+    outcome = _dry_run(code, sample, timeout, memory_limit)
+    if "error" in outcome:
+        errors.append(outcome["error"])
+    elif suffix and not any(suffix in col for col in outcome["columns"]):
+        errors.append(f"No column with the '{suffix}' suffix exists after running the code")
+    return LocalValidation(not errors, errors)
+
+
+def dry_run_sample(dataset, description: dict = None, rows: int = 200) -> pd.DataFrame:
+    if isinstance(dataset, pd.DataFrame):
+        return dataset.sample(min(rows, len(dataset)), random_state=42).sort_index() if len(dataset) > rows else dataset.copy()
+    if isinstance(dataset, (str, os.PathLike)):
+        return next(iter_chunks(dataset, chunksize=rows))
+    return pd.DataFrame((description or {}).get("sample_rows", []))
+
+
+def local_check(code: str, sample: pd.DataFrame, suffix: str, timeout: float = 10.0):
+    # The chain drivers run callables locally instead of sending them to the model.
+    return functools.partial(validate_locally, code, sample, suffix, timeout)
@@ -16,6 +16,10 @@ setup(
         "pandas>=1.0.0",
         "scikit-learn>=0.24.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+        "tracing": ["opentelemetry-api"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
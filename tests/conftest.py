@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Run against the source tree when the package is not installed.
+try:
+    import autoprocess  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "generate", "src"))
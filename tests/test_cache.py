@@ -0,0 +1,42 @@
+import time
+
+from autoprocess.cache import CachedModel, ResponseCache
+
+
+class CountingModel:
+    model_name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        return type("Response", (), {"text": f"answer to {prompt}"})()
+
+
+def test_cached_model_answers_repeated_prompts_from_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    model = CachedModel(CountingModel(), cache)
+    assert model.generate_content("a").text == "answer to a"
+    assert model.generate_content("a").text == "answer to a"
+    assert model.generate_content(["a", "b"]).text == "answer to ['a', 'b']"
+    assert model.model.calls == 2
+    assert cache.stats()["hits"] == 1
+
+    # Entries persist across processes through the same file.
+    reopened = CachedModel(CountingModel(), ResponseCache(str(tmp_path / "responses.sqlite")))
+    reopened.generate_content("a")
+    assert reopened.model.calls == 0
+
+
+def test_response_cache_ttl_and_lru_bound():
+    cache = ResponseCache(":memory:", ttl=0.5, max_entries=2)
+    for key, text in (("a", "1"), ("b", "2")):
+        cache.set(key, text)
+        time.sleep(0.01)
+    assert cache.get("a") == "1"
+    time.sleep(0.01)
+    cache.set("c", "3")
+    assert len(cache) == 2 and cache.get("b") is None
+    time.sleep(0.6)
+    assert cache.get("a") is None
@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from autoprocess.chain import FirstOf, arun_chain, run_chain
+from autoprocess.concurrency import run_all
+
+
+class EchoModel:
+    def __init__(self, fail_on=()):
+        self.prompts = []
+        self.fail_on = fail_on
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if prompt in self.fail_on:
+            raise ConnectionError(prompt)
+        return type("Response", (), {"text": prompt.upper()})()
+
+
+def chain():
+    first = yield "strategy"
+    local = yield lambda: len(first.text)
+    try:
+        yield "broken"
+    except ConnectionError as e:
+        error = str(e)
+    return {"strategy": first.text, "local": local, "error": error}
+
+
+def test_sync_and_async_drivers_agree():
+    expected = {"strategy": "STRATEGY", "local": 8, "error": "broken"}
+    model = EchoModel(fail_on=("broken",))
+    assert run_chain(chain(), model) == expected
+    assert asyncio.run(arun_chain(chain(), model)) == expected
+    # Callables run locally and never reach the model.
+    assert model.prompts == ["strategy", "broken"] * 2
+
+
+def test_first_of_returns_first_non_none_result():
+    def candidate(value, delay):
+        yield lambda: time.sleep(delay)
+        return value
+
+    def racing():
+        return (yield FirstOf([candidate(None, 0), candidate("slow", 0.3), candidate("fast", 0.05)]))
+
+    assert run_chain(racing(), EchoModel()) == "fast"
+    assert asyncio.run(arun_chain(racing(), EchoModel())) == "fast"
+
+
+def test_run_all_keeps_order_and_bounds_concurrency():
+    active, peak = [0], [0]
+
+    async def task(i):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01 * (5 - i))
+        active[0] -= 1
+        return i
+
+    assert run_all([lambda i=i: task(i) for i in range(5)], max_concurrency=2) == [0, 1, 2, 3, 4]
+    assert peak[0] == 2
+
+    async def failing():
+        raise ValueError("bad")
+
+    results = run_all([lambda: task(0), failing], return_exceptions=True)
+    assert results[0] == 0 and isinstance(results[1], ValueError)
+    with pytest.raises(ValueError):
+        run_all([failing])
+
@@ -0,0 +1,73 @@
+import ast
+import pickle
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoprocess import GeneratedTransformer, compile_code
+from autoprocess.compiled import _is_axis_1
+
+
+def _batch(values):
+    return pd.DataFrame({"x": values, "y": [1.0] * len(values)})
+
+
+def test_statistics_and_estimators_are_frozen_at_fit():
+    code = (
+        "```python\nimport pandas as pd\nfrom sklearn.preprocessing import StandardScaler\n"
+        "df['x_filled'] = df['x'].fillna(df['x'].median())\n"
+        "scaler = StandardScaler()\n"
+        "df['x_scaled'] = scaler.fit_transform(df[['x_filled']]).ravel()\n```"
+    )
+    train = _batch([1.0, 2.0, 3.0, np.nan, 5.0])
+    transformer = compile_code({"code": code}).fit(train)
+    out = transformer.transform(_batch([np.nan, 100.0]))
+    assert out["x_filled"].tolist() == [2.5, 100.0]
+    expected = (np.array([2.5, 100.0]) - 2.7) / np.std([1, 2, 3, 2.5, 5])
+    np.testing.assert_allclose(out["x_scaled"], expected)
+    # Persisted transformers replay the same state.
+    restored = pickle.loads(pickle.dumps(transformer))
+    pd.testing.assert_frame_equal(restored.transform(_batch([np.nan, 100.0])), out)
+
+
+@pytest.mark.parametrize("expression", [
+    "df[['x', 'y']].mean(axis=1)", "df[['x', 'y']].mean(1)", "df[['x', 'y']].sum(axis='columns')",
+    "np.mean(df[['x', 'y']].to_numpy(), 1)", "np.percentile(df[['x', 'y']].to_numpy(), 50, 1)",
+    "df[['x', 'y']].quantile(0.5, 1)", "df['x'].rolling(2, min_periods=1).mean()",
+    "df[['x', 'y']].apply(lambda row: row.max(), axis=1)",
+])
+def test_row_wise_calls_are_recomputed(expression):
+    code = f"import numpy as np\ndf['r'] = {expression}\n"
+    transformer = GeneratedTransformer(code).fit(_batch([1.0, 2.0, 3.0]))
+    batch = _batch([10.0, 20.0])
+    expected = eval(expression, {"np": np, "df": batch})
+    np.testing.assert_allclose(transformer.transform(batch)["r"], np.asarray(expected, dtype="float64"))
+
+
+def test_literal_axis_from_python_37_ast():
+    # Python 3.7 parses `1` as ast.Num and "columns" as ast.Str.
+    num = type("Num", (ast.expr,), {})()
+    num.n = 1
+    text = type("Str", (ast.expr,), {})()
+    text.s = "columns"
+    assert _is_axis_1(num) and _is_axis_1(text)
+    assert not _is_axis_1(ast.Constant(value=0))
+
+
+def test_output_schema_is_enforced():
+    code = "import pandas as pd\ndf = pd.get_dummies(df, columns=['c'])\n"
+    transformer = GeneratedTransformer(code).fit(pd.DataFrame({"c": ["a", "b", "a"]}))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        out = transformer.transform(pd.DataFrame({"c": ["a", "z"]}))
+    assert list(out.columns) == transformer.get_feature_names_out() == ["c_a", "c_b"]
+    assert out["c_b"].tolist() == [False, False] and caught
+
+
+def test_transform_requires_fit():
+    with pytest.raises(ValueError):
+        GeneratedTransformer("df['a'] = 1\n").transform(_batch([1.0]))
+    with pytest.raises(ValueError):
+        compile_code({"error": "API not valid"})
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoprocess import ChunkedExecutor
+from autoprocess.execution import _reservoir_rows
+
+CODE = (
+    "import pandas as pd\n"
+    "df['x_centered'] = df['x'] - df['x'].median()\n"
+    "df = pd.get_dummies(df, columns=['c'])\n"
+)
+
+
+def _write_partitions(directory, parts=3, rows=400):
+    for i in range(parts):
+        # Sorted partitions: a head-of-stream fit sample would only see the first one.
+        start = i * rows
+        pd.DataFrame({"x": np.arange(start, start + rows, dtype="float64"),
+                      "c": ["a", "b"] * (rows // 2) if i else ["a"] * rows}).to_csv(os.path.join(directory, f"part{i}.csv"), index=False)
+
+
+def test_fit_sample_spans_every_partition(tmp_path):
+    _write_partitions(tmp_path)
+    executor = ChunkedExecutor(CODE, max_workers=2, chunksize=100, fit_rows=300).fit(str(tmp_path))
+    # The fitted median is close to the overall one (about 600), not the first partition's (200).
+    centered = executor.transformer.transform(pd.DataFrame({"x": [600.0], "c": ["a"]}))["x_centered"].iloc[0]
+    assert abs(centered) < 100
+
+
+def test_run_writes_the_fitted_schema(tmp_path):
+    source, output = tmp_path / "in", tmp_path / "out"
+    source.mkdir()
+    _write_partitions(source)
+    executor = ChunkedExecutor(CODE, max_workers=2, chunksize=150, fit_rows=1200).fit(str(source))
+    results = executor.run(str(source), str(output), output_format="csv")
+    assert [r["rows"] for r in results] == [400, 400, 400]
+    for result in results:
+        # part0.csv never contains "b", yet its output still has every fitted column.
+        assert list(pd.read_csv(result["output"]).columns) == executor.transformer.feature_names_out_
+    single = executor.run(str(source / "part1.csv"), str(tmp_path / "single"), output_format="csv")
+    assert single[0]["rows"] == 400
+
+
+def test_reservoir_rows_keep_at_most_size():
+    chunks = (pd.DataFrame({"x": np.arange(start, start + 100)}) for start in range(0, 1000, 100))
+    sample = _reservoir_rows(chunks, 50)
+    assert len(sample) == 50 and sample["x"].is_unique and sample["x"].max() >= 500
+
+
+def test_parquet_output_needs_pyarrow_up_front(tmp_path, monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def no_pyarrow(name, *args, **kwargs):
+        if name.startswith("pyarrow"):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    _write_partitions(tmp_path, parts=1)
+    executor = ChunkedExecutor(CODE, max_workers=1).fit(str(tmp_path))
+    monkeypatch.setattr(builtins, "__import__", no_pyarrow)
+    monkeypatch.setattr("autoprocess.execution.ProcessPoolExecutor", None)
+    with pytest.raises(ImportError, match="pyarrow"):
+        executor.run(str(tmp_path), str(tmp_path / "out"))
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from autoprocess import ChunkedExecutor, GeneratedTransformer
+from autoprocess.memory import optimize_dtypes
+
+
+def test_replayed_plan_checks_each_batch():
+    train = pd.DataFrame({"a": np.arange(100), "b": np.linspace(0.0, 1.0, 100)})
+    optimized, report = optimize_dtypes(train)
+    assert report["dtypes"]["a"] == "int8" and report["after"] < report["before"]
+    transformer = GeneratedTransformer(report["code"]).fit(train)
+    pd.testing.assert_frame_equal(transformer.transform(train), optimized)
+    # 1000 does not fit int8; the fit batch's min/max must not decide that.
+    out = transformer.transform(pd.DataFrame({"a": [1000, 5], "b": [0.5, 0.25]}))
+    assert out["a"].tolist() == [1000, 5] and out["a"].dtype == "int64"
+
+
+def test_chunked_replay_keeps_out_of_range_values(tmp_path):
+    source, output = tmp_path / "in", tmp_path / "out"
+    source.mkdir()
+    pd.DataFrame({"a": np.arange(100)}).to_csv(source / "part0.csv", index=False)
+    pd.DataFrame({"a": [1000, 5]}).to_csv(source / "part1.csv", index=False)
+    train = pd.DataFrame({"a": np.arange(100)})
+    transformer = GeneratedTransformer(optimize_dtypes(train)[1]["code"]).fit(train)
+    results = ChunkedExecutor(transformer, max_workers=1, chunksize=100).run(str(source), str(output), output_format="csv")
+    written = pd.concat(pd.read_csv(r["output"]) for r in results)
+    assert sorted(written["a"].tolist()) == sorted(list(range(100)) + [1000, 5])
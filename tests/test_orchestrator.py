@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoprocess import PipelineOrchestrator
+
+
+def _frame(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "income": rng.lognormal(10, 1, rows),
+        "age": rng.integers(18, 90, rows).astype("float64"),
+        "city": rng.choice(["a", "b", "c"], rows),
+    })
+    df["y"] = 2 * df["age"] + rng.normal(size=rows)
+    df.loc[rng.random(rows) < 0.1, "age"] = np.nan
+    return df
+
+
+def test_stages_are_cached_and_replayed():
+    orchestrator = PipelineOrchestrator(strategy_engine="local")
+    df = _frame()
+    first = orchestrator.run(df, target="y")
+    assert set(first["code"]) == {"clean", "transform", "unskew", "features"} and first["cached"] == []
+    again = orchestrator.run(df, target="y")
+    assert again["cached"] == list(first["code"])
+    pd.testing.assert_frame_equal(again["data"], first["data"])
+    # Only code, transformer and profile are kept per stage, not the output frames.
+    assert all(entry.output is None for entry in orchestrator.stage_cache._entries.values())
+
+    changed = orchestrator.run(df, target="y", transform=dict(skip_normalisation=["income"]))
+    assert changed["cached"] == ["clean"]
+
+    replayed = orchestrator.transform(_frame(seed=1).head(20))
+    assert list(replayed.columns) == list(changed["data"].columns) and len(replayed) == 20
+
+
+def test_constructor_options_are_routed_per_stage():
+    orchestrator = PipelineOrchestrator(strategy_engine="local", optimize_memory=True, candidates=2)
+    assert orchestrator.pipelines["clean"].optimize_memory
+    assert all(pipeline.candidates == 2 for pipeline in orchestrator.pipelines.values())
+    result = orchestrator.run(_frame(), target="y", unskew=False, features=False)
+    assert "narrow_column" in result["code"]["clean"]
+    with pytest.raises(TypeError, match="optimise_memory"):
+        PipelineOrchestrator(strategy_engine="local", optimise_memory=True)
@@ -0,0 +1,55 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autoprocess import helper
+from autoprocess.cache import ProfileCache
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"a": rng.normal(size=500), "b": rng.normal(size=500), "y": rng.integers(0, 2, 500)})
+
+
+def test_profile_is_reused_per_dataset_version():
+    cache, df = ProfileCache(), _frame()
+    first = helper.describe_dataset(df, target="y", cache=cache)
+    assert helper.describe_dataset(df.copy(), target="y", cache=cache) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Another target reuses the column profile and only recomputes correlations.
+    other = helper.describe_dataset(df, target="a", cache=cache)
+    assert other["columns"] == first["columns"] and "y" in other["correlation"]["a"]
+    changed = df.assign(a=df["a"] + 1)
+    assert helper.describe_dataset(changed, target="y", cache=cache)["columns"]["a"] != first["columns"]["a"]
+
+
+def test_concurrent_misses_profile_once(monkeypatch):
+    calls, profile = [], helper.gen_des
+
+    def slow_gen_des(df, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return profile(df, **kwargs)
+
+    monkeypatch.setattr(helper, "gen_des", slow_gen_des)
+    cache, df = ProfileCache(), _frame()
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: helper.describe_dataset(df, target="y", cache=cache), range(4)))
+    assert len(calls) == 1
+    assert all(result == results[0] for result in results)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_failed_profile_is_not_cached(monkeypatch):
+    def broken(df, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(helper, "gen_des", broken)
+    cache = ProfileCache()
+    with pytest.raises(RuntimeError):
+        helper.describe_dataset(_frame(), cache=cache)
+    assert len(cache) == 0 and not cache._pending
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from autoprocess.helper import gen_des
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "num": rng.normal(size=300),
+        "ints": rng.integers(0, 10, 300),
+        "text": rng.choice(["a", "b", "c"], 300),
+        "cat": pd.Categorical(rng.choice(["x", "y"], 300), categories=["x", "y", "z"]),
+    })
+    df.loc[::7, "num"] = np.nan
+    return df
+
+
+def test_numeric_stats_match_pandas():
+    df = _frame()
+    info = gen_des(df)["columns"]["num"]
+    assert info["mean"] == round(df["num"].mean(), 2)
+    assert info["std"] == round(df["num"].std(), 2)
+    assert info["skew"] == round(df["num"].skew(), 2)
+    assert info["missing_pct"] == round(df["num"].isna().mean() * 100, 1)
+
+
+def test_unique_count_matches_nunique():
+    df = _frame()
+    columns = gen_des(df)["columns"]
+    assert {col: info["unique_count"] for col, info in columns.items()} == df.nunique().to_dict()
+    assert columns["cat"]["unique_count"] == 2
+    assert columns["text"]["value_distribution"]["top_values"] == df["text"].value_counts().head(3).index.tolist()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from autoprocess.cache import ProfileCache
+from autoprocess.helper import compact_description, describe_dataset, gen_des
+
+
+def _wide(columns=300, rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, columns)), columns=[f"c{i}" for i in range(columns)])
+    df["skewed"] = rng.lognormal(0, 2, rows)
+    return df
+
+
+def test_context_respects_the_token_budget():
+    description = gen_des(_wide(), target="c5")
+    for budget in (300, 1000, 4000):
+        text = compact_description(description, target="c5", max_tokens=budget)
+        assert len(text) // 4 <= budget * 1.1
+        lines = text.splitlines()
+        # The target comes first and flagged columns before the rest.
+        assert lines[2].startswith("c5 |") and lines[3].startswith("skewed |")
+    assert "more columns" in compact_description(description, target="c5", max_tokens=300)
+
+
+def test_falsy_column_names_are_kept():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(100, 3)), columns=[0, 1, 2])
+    df[0] = df[1] * 2 + rng.normal(size=100) * 0.1
+    description = describe_dataset(df, target=0, cache=ProfileCache())
+    assert 0 in description["correlation"][1]
+    text = compact_description(description, target=0, focus=[2])
+    lines = text.splitlines()
+    assert "target: 0" in lines[0]
+    assert lines[2].startswith("0 |") and lines[3].startswith("2 |")
+    assert any(line.startswith("correlation with 0:") for line in lines)
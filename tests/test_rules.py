@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from autoprocess import (DataCleaningPipeline, DataTransformationPipeline, FeatureEngineeringPipeline,
+                         SkewCorrectionPipeline)
+from autoprocess.helper import gen_des
+from autoprocess.rules import cleaning_plan, feature_plan, skew_plan, transformation_plan
+
+
+def _frame(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "income": rng.lognormal(10, 1, rows),
+        "age": rng.integers(18, 90, rows),
+        "city": rng.choice(["a", "b", "c"], rows),
+        "mostly_empty": np.where(rng.random(rows) < 0.7, np.nan, 1.0),
+        "noise": rng.normal(size=rows),
+    })
+    df["y"] = 2 * df["age"] + rng.normal(size=rows)
+    df.loc[rng.random(rows) < 0.1, "income"] = np.nan
+    return df
+
+
+def _run(code, df):
+    namespace = {"df": df.copy()}
+    exec(code, namespace)
+    return namespace["df"]
+
+
+def test_cleaning_plan_decides_mechanical_cases():
+    df = _frame()
+    plan = cleaning_plan(gen_des(df), target="y")
+    parameters = plan.strategy["missing_values"]["parameters"]
+    assert parameters["impute"] == {"income": "median"}
+    assert parameters["drop_columns"] == ["mostly_empty"]
+    cleaned = _run(plan.code, df)
+    assert cleaned["income_cleaned"].notna().all() and "mostly_empty" not in cleaned
+
+
+def test_transformation_and_skew_plans_run():
+    df = _frame().dropna(subset=["income"]).drop(columns="mostly_empty")
+    description = gen_des(df)
+    plan = transformation_plan(description, target="y")
+    assert plan.strategy["categorical_encoding"]["city"]["action"] == "one_hot"
+    assert plan.strategy["scaling_normalisation"]["income"]["action"] == "robust_scaler"
+    out = _run(plan.code, df)
+    assert {"city_a_transformed", "age_transformed"} <= set(out.columns)
+    skew = skew_plan(description, ["income"])
+    assert skew.strategy["income"]["method"] == "log_transform" and not skew.ambiguous
+    assert "income_unskewed" in _run(skew.code, df)
+
+
+def test_feature_plan_only_pairs_strongly_correlated_columns():
+    rng = np.random.default_rng(3)
+    noise = pd.DataFrame(rng.normal(size=(500, 4)), columns=list("abcd")).assign(y=rng.normal(size=500))
+    assert not [item for item in feature_plan(gen_des(noise, target="y"), "y").strategy["feature_creation"]
+                if item["method"] == "interaction"]
+    related = noise.assign(y=noise["a"] + noise["b"] + 0.1 * rng.normal(size=500))
+    pairs = [item["columns"] for item in feature_plan(gen_des(related, target="y"), "y").strategy["feature_creation"]]
+    assert pairs == [["a", "b"]] or pairs == [["b", "a"]]
+
+
+def test_local_engine_runs_offline(monkeypatch, capsys):
+    from autoprocess import helper
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("the local engine must not initialize a model")
+
+    monkeypatch.setattr(helper, "initialize_gemini", no_network)
+    df = _frame()
+    for pipeline in (DataCleaningPipeline(strategy_engine="local"), DataTransformationPipeline(strategy_engine="local"),
+                     SkewCorrectionPipeline(strategy_engine="local"), FeatureEngineeringPipeline(strategy_engine="local")):
+        assert pipeline.model is None
+    assert "code" in DataCleaningPipeline(strategy_engine="local").data_clean(df, target="y")
+    assert "code" in FeatureEngineeringPipeline(strategy_engine="local").generate_features(df, "y")
+    assert "API not valid" not in capsys.readouterr().out
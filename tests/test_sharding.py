@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+from autoprocess.concurrency import arun_all, run_all
+from autoprocess.rules import LocalPlan, with_local_strategy
+from autoprocess.sharding import column_shards, merge_shards, parse_strategy, shard_description
+
+
+def _description():
+    columns = {name: {"dtype": "float64", "missing_pct": 0.0, "unique_count": 10} for name in "abcdey"}
+    correlation = {"a": {"d": 0.9, "b": 0.1, "y": 0.3}, "d": {"a": 0.9, "y": 0.2}, "b": {"a": 0.1, "y": 0.0}}
+    return {"columns": columns, "correlation": correlation, "num_rows": 10, "num_columns": 6,
+            "sample_rows": [{name: 1.0 for name in "abcdey"}]}
+
+
+def test_correlated_columns_share_a_shard():
+    shards = column_shards(_description(), 2, target="y")
+    assert ["a", "d"] in shards and all("y" not in shard for shard in shards)
+    assert sorted(col for shard in shards for col in shard) == list("abcde")
+    sliced = shard_description(_description(), ["a", "d"], target="y")
+    assert list(sliced["columns"]) == ["a", "d", "y"] and sliced["correlation"]["a"] == {"d": 0.9, "y": 0.3}
+
+
+def test_hybrid_strategy_keeps_local_decisions():
+    plan = LocalPlan({"categorical_encoding": {"city": {"action": "one_hot"}}, "datatype_handling": {}}, "", ["zip"])
+    text = with_local_strategy(plan, '```json\n{"categorical_encoding": {"zip": {"action": "target"}}}\n```')
+    assert parse_strategy(text)["categorical_encoding"] == {"city": {"action": "one_hot"}, "zip": {"action": "target"}}
+
+
+def test_merge_shards_combines_code_and_defers_drops():
+    results = [
+        {"code": "import pandas as pd\ndf['a_engineered'] = df['a'] * 2", "strategy": '{"columns_to_drop": ["b", "y"]}'},
+        {"code": "import pandas as pd\nimport numpy as np\ndf['c_engineered'] = np.log1p(df['c'])",
+         "strategy": '{"columns_to_drop": ["b", "c"]}'},
+    ]
+    merged = merge_shards(results, [["a", "b"], ["c"]], target="y")
+    assert json.loads(merged["strategy"])["columns_to_drop"] == ["b", "c"]
+    code = merged["code"]
+    assert code.count("import pandas as pd") == 1
+    assert code.index("c_engineered") < code.index("df.drop(columns=['b', 'c']")
+    assert "error" in merge_shards([{"error": "boom"}, results[0]], [["a"], ["b"]])
+
+
+def test_run_all_inside_a_running_loop():
+    async def main():
+        return run_all([lambda: asyncio.sleep(0, result="done")]), await arun_all([lambda: asyncio.sleep(0, result=1)])
+
+    assert asyncio.run(main()) == (["done"], [1])
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from autoprocess.helper import gen_des
+from autoprocess.sketch import HeavyHitters, HyperLogLog, _bit_length
+
+
+def test_bit_length_is_exact():
+    values = np.array([0, 1, 2, 3, 2**53 - 1, 2**53 + 1, 2**54 - 1, 2**63, 2**64 - 1], dtype="uint64")
+    assert _bit_length(values).tolist() == [int(v).bit_length() for v in values]
+
+
+def test_hyperloglog_merges_halves():
+    values = pd.Series(np.arange(60_000) % 25_000)
+    left, right = HyperLogLog(0.01).update(values[:30_000]), HyperLogLog(0.01).update(values[30_000:])
+    assert abs(left.merge(right).estimate() - 25_000) < 25_000 * 0.03
+
+
+def test_heavy_hitters_bound_on_high_cardinality():
+    rng = np.random.default_rng(0)
+    values = pd.Series(np.concatenate([np.repeat(["hot", "warm"], [5000, 2000]), rng.integers(0, 10**6, 50_000).astype(str)]))
+    values = values.sample(frac=1, random_state=0).reset_index(drop=True)
+    hitters = HeavyHitters(0.01)
+    for start in range(0, len(values), 5000):
+        hitters.update(values[start:start + 5000])
+    assert len(hitters.counts) <= hitters.capacity
+    assert hitters.total == len(values)
+    assert [value for value, _ in hitters.top(2)] == ["hot", "warm"]
+    for value, exact in (("hot", 5000), ("warm", 2000)):
+        assert exact - 0.01 * len(values) <= hitters.counts[value] <= exact
+
+
+def test_approximate_profile_is_close_to_exact():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"x": rng.lognormal(size=20_000), "g": rng.choice(list("abcde"), 20_000, p=[.5, .2, .1, .1, .1])})
+    exact, approx = gen_des(df), gen_des(df, approximate=True)
+    assert approx["columns"]["x"]["mean"] == exact["columns"]["x"]["mean"]
+    assert approx["columns"]["g"]["unique_count"] == 5
+    assert approx["columns"]["g"]["value_distribution"]["top_values"][0] == "a"
@@ -0,0 +1,66 @@
+import asyncio
+import re
+import threading
+import time
+
+import pandas as pd
+
+from autoprocess import DataCleaningPipeline, DataTransformationPipeline
+
+
+class ScriptedModel:
+    """Candidate k writes `= k`; validation passes only the codes in `good`."""
+
+    def __init__(self, good=("refined",)):
+        self.good = good
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        if prompt.startswith(("Review", "Validate")):
+            verdict = any(f"= {value!r}" in prompt for value in self.good)
+            text = "production-ready" if verdict else "Use a vectorized operation instead."
+        elif prompt.startswith("Feedback"):
+            text = "import pandas as pd\ndf['a_transformed'] = 'refined'\ndf['a_cleaned'] = 'refined'"
+        elif "Candidate" in prompt:
+            k = int(re.search(r"Candidate (\d+) of", prompt).group(1))
+            time.sleep(0.01 * k)
+            text = f"import pandas as pd\ndf['a_transformed'] = {str(k)!r}\ndf['a_cleaned'] = {str(k)!r}"
+        elif prompt.startswith("Generate"):
+            text = "import pandas as pd\ndf['a_transformed'] = 'serial'"
+        else:
+            text = "{}"
+        return type("Response", (), {"text": text})()
+
+    def count(self, prefix):
+        return sum(prompt.startswith(prefix) for prompt in self.prompts)
+
+
+DF = pd.DataFrame({"a": [1.0, 2.0, 3.0], "b": ["x", "y", "x"]})
+
+
+def test_first_passing_candidate_wins():
+    model = ScriptedModel(good=("2", "3"))
+    result = DataTransformationPipeline(model=model, scheduler=False, candidates=3).generate_transformation_code(DF)
+    assert "'2'" in result["code"]
+    assert model.count("Feedback") == 0 and model.count("Generate") == 3
+
+
+def test_refines_the_first_failing_candidate_when_none_passes():
+    model = ScriptedModel()
+    pipeline = DataTransformationPipeline(model=model, scheduler=False, candidates=3)
+    result = pipeline.generate_transformation_code(DF)
+    assert "'refined'" in result["code"]
+    # No fresh code request after speculation, and one refine/validate cycle instead of starting over.
+    assert model.count("Generate") == 3 and model.count("Review") == 4 and model.count("Feedback") == 1
+    refinement = next(prompt for prompt in model.prompts if prompt.startswith("Feedback"))
+    assert "Use a vectorized operation" in refinement and "= '1'" in refinement
+
+
+def test_async_driver_refines_the_same_way():
+    model = ScriptedModel()
+    result = asyncio.run(DataCleaningPipeline(model=model, scheduler=False, candidates=2).adata_clean(DF))
+    assert "'refined'" in result["code"]
+    assert model.count("Generate") == 2 and model.count("Feedback") == 1
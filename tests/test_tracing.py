@@ -0,0 +1,63 @@
+import importlib.util
+
+import pandas as pd
+import pytest
+
+from autoprocess import DataTransformationPipeline, Tracer
+from autoprocess.tracing import TracedModel, count, span
+
+
+class EchoModel:
+    model_name = "echo"
+
+    def generate_content(self, prompt, **kwargs):
+        if str(prompt).startswith("Review"):
+            return type("Response", (), {"text": "production-ready"})()
+        return type("Response", (), {"text": "import pandas as pd\ndf['a_transformed'] = df['a']"})()
+
+
+def test_spans_and_calls_are_recorded_only_inside_a_run():
+    events = []
+    tracer = Tracer(hooks=[events.append])
+    model = TracedModel(EchoModel())
+    model.generate_content("outside")
+    with span("ignored"):
+        count("ignored")
+    assert events == []
+
+    with tracer.run("job") as report:
+        with span("step", columns=3) as attributes:
+            model.generate_content("x" * 40)
+            attributes["done"] = True
+        count("refine_iterations", 2)
+    summary = report.to_dict()
+    assert summary["summary"]["model_calls"] == 1
+    assert summary["summary"]["prompt_tokens"] == 11
+    assert summary["summary"]["refine_iterations"] == 2
+    step = next(s for s in summary["spans"] if s["name"] == "step")
+    assert step["parent"] == "job" and step["attributes"] == {"columns": 3, "done": True}
+    assert summary["calls"][0]["span"] == "step" and summary["calls"][0]["tokens_estimated"]
+    assert [event["type"] for event in events] == ["call", "span", "span", "run"]
+
+
+def test_run_records_the_error_and_reraises():
+    tracer = Tracer()
+    with pytest.raises(KeyError):
+        with tracer.run("job") as report:
+            raise KeyError("a")
+    assert report.error == "KeyError: 'a'" and report.duration is not None
+
+
+def test_pipeline_attaches_its_report():
+    pipeline = DataTransformationPipeline(model=EchoModel(), tracer=Tracer())
+    result = pipeline.generate_transformation_code(pd.DataFrame({"a": [1.0, 2.0, 3.0]}))
+    assert result["code"].endswith("df['a']")
+    assert result["report"]["name"] == "generate_transformation_code"
+    assert result["report"]["summary"]["model_calls"] == 3
+    assert pipeline.last_report == result["report"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("opentelemetry") is not None, reason="opentelemetry is installed")
+def test_opentelemetry_export_requires_the_api_package():
+    with pytest.raises(ImportError, match="opentelemetry-api"):
+        Tracer(opentelemetry=True)
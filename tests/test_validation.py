@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import pytest
+
+from autoprocess import validation
+from autoprocess.validation import dry_run_sample, validate_locally
+
+SAMPLE = pd.DataFrame({"a": [1.0, None, 3.0], "b": ["x", "y", "x"]})
+
+
+def test_working_code_passes():
+    code = "```python\nimport pandas as pd\ndf['a_cleaned'] = df['a'].fillna(df['a'].median())\n```"
+    result = validate_locally(code, SAMPLE, "_cleaned")
+    assert result.ok and "passed" in result.text
+
+
+def test_errors_are_reported_as_feedback():
+    assert "SyntaxError" in validate_locally("df['a' = 1", SAMPLE).errors[0]
+    result = validate_locally("df['a_cleaned'] = df['missing']\n", SAMPLE, "_cleaned")
+    assert not result.ok and "KeyError" in result.text
+    assert "suffix" in validate_locally("df['a'] = 1\n", SAMPLE, "_cleaned").errors[0]
+
+
+def test_dry_run_is_isolated(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "secret")
+    code = "import os\nassert 'GOOGLE_API_KEY' not in os.environ, 'key leaked'\ndf['a_x'] = 1\n"
+    assert validate_locally(code, SAMPLE, "_x").ok
+    result = validate_locally("while True:\n    pass\n", SAMPLE, timeout=1)
+    assert "did not finish" in result.errors[0]
+    if os.name == "posix":
+        result = validate_locally("x = bytearray(3 * 1024 ** 3)\n", SAMPLE, memory_limit=1024 ** 3)
+        assert "MemoryError" in result.errors[0]
+
+
+def test_runner_failures_are_not_code_defects(monkeypatch):
+    monkeypatch.setattr(validation, "RUNNER", "import sys\nsys.exit('No module named pandas')\n")
+    with pytest.raises(RuntimeError, match="No module named pandas"):
+        validate_locally("df['a'] = 1\n", SAMPLE)
+
+
+def test_dry_run_sample_is_bounded():
+    frame = pd.DataFrame({"a": range(1000)})
+    sample = dry_run_sample(frame, rows=50)
+    assert len(sample) == 50 and sample.index.is_monotonic_increasing
+    assert list(dry_run_sample(None, {"sample_rows": [{"a": 1}]})["a"]) == [1]